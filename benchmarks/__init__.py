@@ -0,0 +1 @@
+"""Headless benchmarks for the scoring engine (see benchmarks/run.py)"""
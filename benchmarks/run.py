@@ -0,0 +1,267 @@
+"""Benchmark the tap-to-save path of the scoring engine.
+    
+    python -m benchmarks.run                       # print a report
+    python -m benchmarks.run --out new.json        # also save results
+    python -m benchmarks.run compare old.json new.json
+    python -m benchmarks.run --against HEAD~1      # run both trees, compare
+
+Every scenario is generated from --seed, so two runs on the same machine
+bowl exactly the same balls. --against checks the given git revision out
+into a temporary worktree and benchmarks its score247 package with this
+copy of the harness; the revision must already contain score247.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+OPERATIONS = ['process_delivery', 'save_snapshot', 'undo', 'persist_to_disk', 'load_from_disk',
+              'state_at']
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class Recorder:
+    """Collects per-call timings, or allocation figures when tracing"""
+    
+    def __init__(self, trace_allocations: bool):
+        self.trace = trace_allocations
+        self.samples = {op: [] for op in OPERATIONS}
+    
+    def wrap(self, op: str, fn):
+        samples = self.samples[op]
+        
+        if self.trace:
+            def traced(*args, **kwargs):
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                blocks = sys.getallocatedblocks()
+                result = fn(*args, **kwargs)
+                samples.append((sys.getallocatedblocks() - blocks,
+                                tracemalloc.get_traced_memory()[1] - base))
+                return result
+            return traced
+        
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            result = fn(*args, **kwargs)
+            samples.append(time.perf_counter_ns() - start)
+            return result
+        return timed
+
+
+def run_scenario(scenario, seed: int, recorder: Recorder):
+    import random
+    from score247 import MatchManager
+    from benchmarks.synthetic import play_innings, setup_match
+    
+    data_dir = tempfile.mkdtemp(prefix='score247-bench-')
+    try:
+        mgr = MatchManager(data_dir)
+        setup_match(mgr, scenario)
+        
+        # Instance attributes shadow the methods, so internal calls
+        # (process_delivery -> save_snapshot -> ...) are measured too.
+        for op in ('save_snapshot', 'persist_to_disk'):
+            setattr(mgr, op, recorder.wrap(op, getattr(mgr, op)))
+        deliver = recorder.wrap('process_delivery', mgr.process_delivery)
+        
+        rng = random.Random(seed)
+        play_innings(mgr, rng, scenario.model, deliver)
+        mgr.end_innings()
+        play_innings(mgr, rng, scenario.model, deliver)
+        
+        for _ in range(20):
+            mgr.persist_to_disk()
+        
+        load = recorder.wrap('load_from_disk', lambda m: m.load_from_disk())
+        for _ in range(20):
+            load(MatchManager(data_dir))
+        
+        # Time travel on a freshly loaded match, so every checkpoint is
+        # built on demand (engines older than the timeline skip this)
+        loaded = MatchManager(data_dir)
+        if loaded.load_from_disk() and hasattr(loaded, 'timeline'):
+            timeline = loaded.timeline
+            state_at = recorder.wrap('state_at', timeline.state_at)
+            total = timeline.total_balls()
+            for position in rng.sample(range(total + 1), min(40, total + 1)):
+                state_at(*timeline.locate(position))
+        
+        undo = recorder.wrap('undo', mgr.undo)
+        while mgr.undo_stack:
+            undo()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def run_all(seed: int, repeat: int, names=None) -> dict:
+    from benchmarks.synthetic import SCENARIOS
+    
+    results = {}
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names:
+            continue
+        
+        timing = Recorder(trace_allocations=False)
+        for i in range(repeat):
+            run_scenario(scenario, seed + i, timing)
+        
+        allocs = Recorder(trace_allocations=True)
+        tracemalloc.start()
+        try:
+            run_scenario(scenario, seed, allocs)
+        finally:
+            tracemalloc.stop()
+        
+        ops = {}
+        for op in OPERATIONS:
+            times = sorted(timing.samples[op])
+            if not times:
+                continue
+            traced = allocs.samples[op]
+            ops[op] = {
+                'calls': len(times),
+                'p50_us': percentile(times, 50) / 1000,
+                'p90_us': percentile(times, 90) / 1000,
+                'p99_us': percentile(times, 99) / 1000,
+                'max_us': times[-1] / 1000,
+                'blocks_per_call': sum(b for b, _ in traced) / max(1, len(traced)),
+                'peak_kib_per_call': sum(p for _, p in traced) / max(1, len(traced)) / 1024,
+            }
+        results[scenario.name] = ops
+    return results
+
+
+def git_revision(path: str) -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=path,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_report(report: dict):
+    meta = report['meta']
+    print(f"score247 benchmarks @ {meta['revision']} (seed {meta['seed']}, "
+          f"python {meta['python']})")
+    for name, ops in report['results'].items():
+        print(f"\n{name}")
+        print(f"  {'operation':<18}{'calls':>7}{'p50 us':>10}{'p90 us':>10}"
+              f"{'p99 us':>10}{'max us':>10}{'blocks':>9}{'peak KiB':>10}")
+        for op, r in ops.items():
+            print(f"  {op:<18}{r['calls']:>7}{r['p50_us']:>10.1f}{r['p90_us']:>10.1f}"
+                  f"{r['p99_us']:>10.1f}{r['max_us']:>10.1f}{r['blocks_per_call']:>9.1f}"
+                  f"{r['peak_kib_per_call']:>10.2f}")
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """Print p50/p99 ratios; returns True if any p50 regressed past threshold"""
+    print(f"comparing {old['meta']['revision']} -> {new['meta']['revision']} "
+          f"(regression threshold {threshold:.0%})")
+    regressed = False
+    for name, ops in new['results'].items():
+        old_ops = old['results'].get(name, {})
+        print(f"\n{name}")
+        for op, r in ops.items():
+            before = old_ops.get(op)
+            if not before or not before['p50_us']:
+                print(f"  {op:<18} new")
+                continue
+            ratio = r['p50_us'] / before['p50_us']
+            p99_ratio = r['p99_us'] / before['p99_us'] if before['p99_us'] else 0.0
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            print(f"  {op:<18} p50 {before['p50_us']:>9.1f} -> {r['p50_us']:>9.1f} us "
+                  f"({ratio:5.2f}x)  p99 {p99_ratio:5.2f}x{flag}")
+    return regressed
+
+
+def run_against(rev: str, args) -> dict:
+    """Benchmark the engine at another git revision with this harness"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    worktree = tempfile.mkdtemp(prefix='score247-rev-')
+    out = os.path.join(worktree, 'bench.json')
+    subprocess.check_call(['git', 'worktree', 'add', '--detach', '-f', worktree, rev], cwd=root,
+                          stdout=subprocess.DEVNULL)
+    try:
+        cmd = [sys.executable, os.path.abspath(__file__), '--engine', worktree,
+               '--seed', str(args.seed), '--repeat', str(args.repeat), '--out', out, '--quiet']
+        for name in args.scenario or []:
+            cmd += ['--scenario', name]
+        subprocess.check_call(cmd, cwd=root)
+        with open(out) as f:
+            return json.load(f)
+    finally:
+        subprocess.call(['git', 'worktree', 'remove', '--force', worktree], cwd=root,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('command', nargs='*', help="'compare OLD.json NEW.json' or nothing")
+    parser.add_argument('--seed', type=int, default=247)
+    parser.add_argument('--repeat', type=int, default=3, help='matches per scenario')
+    parser.add_argument('--scenario', action='append', help='only run the named scenario')
+    parser.add_argument('--out', help='write results as JSON')
+    parser.add_argument('--against', metavar='REV', help='also benchmark REV and compare')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='p50 slowdown treated as a regression (default 0.10)')
+    parser.add_argument('--engine', help=argparse.SUPPRESS)
+    parser.add_argument('--quiet', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.command:
+        if args.command[0] != 'compare' or len(args.command) != 3:
+            parser.error("usage: compare OLD.json NEW.json")
+        with open(args.command[1]) as f:
+            old = json.load(f)
+        with open(args.command[2]) as f:
+            new = json.load(f)
+        return 1 if compare(old, new, args.threshold) else 0
+    
+    harness = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    engine = os.path.abspath(args.engine) if args.engine else harness
+    # The harness (benchmarks/) always comes from this tree; score247 from --engine.
+    sys.path[:0] = [engine, harness] if engine != harness else [harness]
+    
+    report = {
+        'meta': {
+            'revision': git_revision(engine),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'results': run_all(args.seed, args.repeat, args.scenario),
+    }
+    
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if not args.quiet:
+        print_report(report)
+    
+    if args.against:
+        baseline = run_against(args.against, args)
+        print()
+        return 1 if compare(baseline, report, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
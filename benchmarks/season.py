@@ -0,0 +1,162 @@
+"""Simulate seasons of synthetic matches under different rule settings.
+    
+    python -m benchmarks.season                            # 3 rules, 8 combinations
+    python -m benchmarks.season --matches 50000 --workers 8
+    python -m benchmarks.season --vary wide_gives_runs --vary noball_rebowled
+    python -m benchmarks.season --scenario 20ov-11p --out season.json
+
+Every match is bowled through the real MatchManager rules with the
+seeded ball model of one of the benchmark scenarios, so only the rules
+differ between combinations. Matches are split into chunks spread over a
+process pool; each chunk is seeded from --seed, the combination and its
+own number, so a run gives the same figures whatever --workers is.
+Nothing is written to disk.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Rules that can be varied, with the app's defaults
+RULES = {
+    'wide_gives_runs': True,
+    'wide_counts_as_ball': False,
+    'noball_gives_runs': True,
+    'noball_rebowled': True,
+    'last_man_can_play': False,
+}
+DEFAULT_VARY = ['wide_counts_as_ball', 'noball_rebowled', 'last_man_can_play']
+
+TOTALS = ('matches', 'first_runs', 'second_runs', 'chases_won', 'ties',
+          'extras', 'runs', 'deliveries')
+
+
+def simulate_chunk(task) -> dict:
+    """Play `count` matches under one rule combination; totals only"""
+    from score247 import MatchManager
+    from benchmarks.synthetic import SCENARIOS, play_innings, setup_match
+    
+    scenario_name, rules, seed, count = task
+    scenario = next(s for s in SCENARIOS if s.name == scenario_name)
+    rng = random.Random(seed)
+    
+    # A manager that never touches the disk: replaying skips persistence
+    mgr = MatchManager(os.devnull)
+    totals = dict.fromkeys(TOTALS, 0)
+    for _ in range(count):
+        setup_match(mgr, scenario)
+        for name, value in rules.items():
+            setattr(mgr, name, value)
+        mgr.replaying = True
+        
+        deliveries = play_innings(mgr, rng, scenario.model)
+        mgr.end_innings()
+        deliveries += play_innings(mgr, rng, scenario.model)
+        mgr.end_innings()
+        
+        s = mgr.state
+        first, second = s.innings1_data, s.innings2_data
+        totals['matches'] += 1
+        totals['first_runs'] += first.score
+        totals['second_runs'] += second.score
+        totals['chases_won'] += second.score > first.score
+        totals['ties'] += second.score == first.score
+        totals['extras'] += first.extras + second.extras
+        totals['runs'] += first.score + second.score
+        totals['deliveries'] += deliveries
+    return totals
+
+
+def combinations(vary):
+    """Every True/False setting of the rules in `vary`, others at their defaults"""
+    for values in itertools.product((False, True), repeat=len(vary)):
+        rules = dict(RULES)
+        rules.update(zip(vary, values))
+        yield rules
+
+
+def run_season(scenario: str, vary, matches: int, workers: int, seed: int,
+               chunk: int = 500) -> list:
+    """One summary dict per rule combination"""
+    combos = list(combinations(vary))
+    tasks, owners = [], []
+    for c, rules in enumerate(combos):
+        for start in range(0, matches, chunk):
+            tasks.append((scenario, rules, f'{seed}:{c}:{start}', min(chunk, matches - start)))
+            owners.append(c)
+    
+    sums = [dict.fromkeys(TOTALS, 0) for _ in combos]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for c, totals in zip(owners, pool.map(simulate_chunk, tasks)):
+            for key, value in totals.items():
+                sums[c][key] += value
+    
+    results = []
+    for rules, t in zip(combos, sums):
+        n = t['matches']
+        results.append({
+            'rules': {name: rules[name] for name in vary},
+            'matches': n,
+            'avg_first_innings': t['first_runs'] / n,
+            'avg_second_innings': t['second_runs'] / n,
+            'chase_success': t['chases_won'] / n,
+            'tie_rate': t['ties'] / n,
+            'extras_share': t['extras'] / t['runs'] if t['runs'] else 0.0,
+            'deliveries_per_match': t['deliveries'] / n,
+        })
+    return results
+
+
+def print_report(results: list, vary):
+    header = ' '.join(f'{name[:14]:>14}' for name in vary)
+    print(f"{header}  {'1st inn':>8} {'2nd inn':>8} {'chase %':>8} {'tie %':>6} "
+          f"{'extras %':>8} {'balls':>6}")
+    for r in results:
+        flags = ' '.join(f"{'yes' if r['rules'][name] else 'no':>14}" for name in vary)
+        print(f"{flags}  {r['avg_first_innings']:8.1f} {r['avg_second_innings']:8.1f} "
+              f"{r['chase_success'] * 100:8.1f} {r['tie_rate'] * 100:6.1f} "
+              f"{r['extras_share'] * 100:8.1f} {r['deliveries_per_match']:6.1f}")
+
+
+def main(argv=None) -> int:
+    from benchmarks.synthetic import SCENARIOS
+    
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scenario', default=SCENARIOS[0].name,
+                        choices=[s.name for s in SCENARIOS],
+                        help='overs, players and ball model (default %(default)s)')
+    parser.add_argument('--vary', action='append', choices=list(RULES),
+                        help=f"rule to try both ways (default {', '.join(DEFAULT_VARY)})")
+    parser.add_argument('--matches', type=int, default=20000, help='matches per combination')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes')
+    parser.add_argument('--chunk', type=int, default=500, help='matches per task')
+    parser.add_argument('--seed', type=int, default=247)
+    parser.add_argument('--out', help='write results as JSON')
+    args = parser.parse_args(argv)
+    
+    vary = list(dict.fromkeys(args.vary or DEFAULT_VARY))
+    start = time.perf_counter()
+    results = run_season(args.scenario, vary, args.matches, args.workers, args.seed, args.chunk)
+    elapsed = time.perf_counter() - start
+    
+    print_report(results, vary)
+    total = sum(r['matches'] for r in results)
+    print(f"\n{total} matches in {elapsed:.1f} s on {args.workers} workers "
+          f"({total / elapsed:.0f} matches/s)")
+    
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({
+                'meta': {'scenario': args.scenario, 'seed': args.seed, 'seconds': elapsed},
+                'results': results,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Seeded synthetic matches for benchmarking.
+
+Only uses the public MatchManager API so the same generator can drive the
+engine from older commits when comparing results.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+
+@dataclass
+class BallModel:
+    """Outcome probabilities for one delivery"""
+    wide: float = 0.06
+    noball: float = 0.03
+    wicket: float = 0.05
+    # Relative weights for 0..6 runs off the bat
+    runs_weights: Tuple[int, ...] = (35, 30, 12, 3, 12, 1, 7)
+
+
+@dataclass
+class Scenario:
+    name: str
+    overs: int
+    players: int
+    model: BallModel
+    wide_counts_as_ball: bool = False
+    noball_rebowled: bool = True
+    last_man_can_play: bool = False
+
+
+SCENARIOS = [
+    Scenario('5ov-6p', 5, 6, BallModel()),
+    Scenario('20ov-11p', 20, 11, BallModel()),
+    Scenario('50ov-15p', 50, 15, BallModel(wicket=0.025)),
+    # Pathological: most deliveries are wides that never count as a ball
+    Scenario('wides-5ov', 5, 6, BallModel(wide=0.7, wicket=0.02)),
+]
+
+
+def random_delivery(rng: random.Random, model: BallModel):
+    r = rng.random()
+    if r < model.wide:
+        return rng.choice((0, 0, 0, 1, 4)), True, False, False, 0
+    r -= model.wide
+    if r < model.noball:
+        return rng.choices(range(7), model.runs_weights)[0], False, True, False, 0
+    r -= model.noball
+    if r < model.wicket:
+        return 0, False, False, True, 0
+    return rng.choices(range(7), model.runs_weights)[0], False, False, False, 0
+
+
+def setup_match(mgr, scenario: Scenario):
+    mgr.reset_config()
+    mgr.overs = scenario.overs
+    mgr.players_per_team = scenario.players
+    mgr.wide_counts_as_ball = scenario.wide_counts_as_ball
+    mgr.noball_rebowled = scenario.noball_rebowled
+    mgr.last_man_can_play = scenario.last_man_can_play
+    mgr.team1_players = [f'A{i + 1}' for i in range(scenario.players)]
+    mgr.team2_players = [f'B{i + 1}' for i in range(scenario.players)]
+    mgr.batting_team_name = mgr.team1_name
+    mgr.bowling_team_name = mgr.team2_name
+    mgr.init_players()
+
+
+def play_innings(mgr, rng: random.Random, model: BallModel,
+                 deliver: Optional[Callable] = None, max_deliveries: int = 5000) -> int:
+    """Bowl until the innings is over, rotating the bowler every over.
+    
+    Returns the number of deliveries bowled.
+    """
+    deliver = deliver or mgr.process_delivery
+    bowlers = len(mgr.get_bowling_stats())
+    over = -1
+    count = 0
+    
+    while not mgr.is_innings_over() and count < max_deliveries:
+        if mgr.state.legal_balls // 6 != over:
+            over = mgr.state.legal_balls // 6
+            mgr.change_bowler(over % bowlers)
+        deliver(*random_delivery(rng, model))
+        count += 1
+    return count
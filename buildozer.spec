@@ -13,10 +13,10 @@ source.include_exts = py,png,jpg,kv,atlas
 version = 1.0.0
 
 # Requirements
-requirements = python3,kivy==2.3.0
+requirements = python3,kivy==2.3.0,sqlite3,numpy
 
-# Permissions (MINIMAL - offline only)
-android.permissions = 
+# Permissions (MINIMAL - INTERNET only for the local live scoreboard)
+android.permissions = INTERNET
 
 # Orientation (portrait only for consistent UX)
 orientation = portrait
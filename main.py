@@ -1,8 +1,11 @@
-import copy
-from dataclasses import dataclass, field, asdict
-from typing import List, Optional
+import os
+import time
+
+# Taken before Kivy loads, so the startup profile covers the imports too
+STARTUP_T0 = time.perf_counter()
 
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
@@ -12,352 +15,73 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.togglebutton import ToggleButton
 from kivy.uix.popup import Popup
 from kivy.uix.scrollview import ScrollView
-from kivy.storage.jsonstore import JsonStore
+from kivy.uix.slider import Slider
+from kivy.uix.widget import Widget
 from kivy.core.window import Window
+from kivy.graphics import Color, Ellipse, Line, Rectangle
 import random
 
+from score247 import MatchRegistry, Tournament
+from score247.broadcast import ScoreBroadcaster
+from score247.notation import parse_deliveries
+from score247 import instrument, winprob
+from score247.winprob import WinProbabilityWorker, chase_spec
 from ui_theme import *
 
-# --- Data Models --- (NO CHANGES)
+# Matches being scored; `mgr` is always the active one (see switch_match)
+registry = MatchRegistry()
+mgr = registry.active
 
-@dataclass
-class PlayerStats:
-    """Individual player statistics"""
-    name: str = "Player"
-    runs: int = 0
-    balls_faced: int = 0
-    fours: int = 0
-    sixes: int = 0
-    wickets: int = 0
-    runs_conceded: int = 0
-    legal_balls_bowled: int = 0
-    
-    def strike_rate(self) -> float:
-        return (self.runs / self.balls_faced * 100) if self.balls_faced > 0 else 0.0
-    
-    def economy(self) -> float:
-        overs = self.legal_balls_bowled / 6
-        return (self.runs_conceded / overs) if overs > 0 else 0.0
+# Latency histograms; also switched on from the diagnostics screen
+if os.environ.get('SCORE247_INSTRUMENT'):
+    instrument.enable()
 
-@dataclass
-class InningsData:
-    """Store complete innings data"""
-    score: int = 0
-    wickets: int = 0
-    legal_balls: int = 0
-    extras: int = 0
-    
-    def overs_str(self) -> str:
-        return f"{self.legal_balls // 6}.{self.legal_balls % 6}"
+# Chase win probability, when NumPy is available (started in build)
+win_worker = None
 
-@dataclass
-class MatchState:
-    """Complete match state at any moment"""
-    score: int = 0
-    wickets: int = 0
-    legal_balls: int = 0
-    extras: int = 0
-    
-    striker_idx: int = 0
-    non_striker_idx: int = 1
-    bowler_idx: int = 0
+# Live scoreboard for spectators, switched on from the home screen
+broadcaster = ScoreBroadcaster(mgr)
+
+# League the app's results go into, when one has been saved (Tournament.save)
+TOURNAMENT_FILE = 'score247_tournament.json'
+
+def switch_match(key):
+    """Make another match the active one, just as it was left"""
+    global mgr
+    mgr = registry.switch(key)
+    broadcaster.follow(mgr)
+
+# Build the scoring screen this long after the first frame, instead of
+# waiting for the first tap on Start Match (None to disable)
+PREWARM_SCORING_DELAY = 0.5
+
+
+class StartupProfile:
+    """Startup phase timings, printed when SCORE247_STARTUP_PROFILE is set"""
     
-    current_innings: int = 1
-    target: Optional[int] = None
+    BUDGET_MS = 1500
     
-    innings1_data: Optional[InningsData] = None
-    innings2_data: Optional[InningsData] = None
+    def __init__(self, t0):
+        self.enabled = bool(os.environ.get('SCORE247_STARTUP_PROFILE'))
+        self.marks = [('start', t0)]
     
-    ball_history: List[str] = field(default_factory=list)
+    def mark(self, phase):
+        if self.enabled:
+            self.marks.append((phase, time.perf_counter()))
     
-    team1_stats: List[PlayerStats] = field(default_factory=list)
-    team2_stats: List[PlayerStats] = field(default_factory=list)
+    def report(self):
+        if not self.enabled:
+            return
+        for (_, before), (phase, at) in zip(self.marks, self.marks[1:]):
+            print(f"Startup: {phase:<18} +{(at - before) * 1000:7.1f} ms")
+        total = (self.marks[-1][1] - self.marks[0][1]) * 1000
+        verdict = 'OVER BUDGET' if total > self.BUDGET_MS else 'ok'
+        print(f"Startup: {self.marks[-1][0]} at {total:.1f} ms "
+              f"(budget {self.BUDGET_MS} ms, {verdict})")
 
-class MatchManager:
-    """Core match management - NO LOGIC CHANGES"""
-    
-    def __init__(self):
-        self.store = JsonStore('score247_data.json')
-        self.reset_config()
-    
-    def reset_config(self):
-        self.team1_name = "Team A"
-        self.team2_name = "Team B"
-        self.overs = 5
-        self.players_per_team = 6
-        
-        self.team1_players = []
-        self.team2_players = []
-        
-        self.wide_gives_runs = True
-        self.wide_counts_as_ball = False
-        self.noball_gives_runs = True
-        self.noball_rebowled = True
-        self.last_man_can_play = False
-        
-        self.batting_team_name = ""
-        self.bowling_team_name = ""
-        self.toss_winner = ""
-        
-        self.is_resumed = False
-        
-        self.state = MatchState()
-        self.undo_stack = []
-    
-    def init_players(self):
-        self.state.team1_stats = [PlayerStats(name=name) for name in self.team1_players]
-        self.state.team2_stats = [PlayerStats(name=name) for name in self.team2_players]
-    
-    def get_batting_stats(self) -> List[PlayerStats]:
-        return (self.state.team1_stats if self.batting_team_name == self.team1_name 
-                else self.state.team2_stats)
-    
-    def get_bowling_stats(self) -> List[PlayerStats]:
-        return (self.state.team2_stats if self.batting_team_name == self.team1_name 
-                else self.state.team1_stats)
-    
-    def get_rules_summary(self) -> str:
-        lines = [
-            f"Overs: {self.overs}",
-            f"Players per team: {self.players_per_team}",
-            "",
-            "Wide ball rules:",
-            f"  • Gives run: {'Yes' if self.wide_gives_runs else 'No'}",
-            f"  • Counts as ball: {'Yes' if self.wide_counts_as_ball else 'No'}",
-            "",
-            "No-ball rules:",
-            f"  • Gives run: {'Yes' if self.noball_gives_runs else 'No'}",
-            f"  • Re-bowled: {'Yes' if self.noball_rebowled else 'No'}",
-            f"  • Wickets allowed: All (gully rules)",
-            "",
-            f"Last man can play: {'Yes' if self.last_man_can_play else 'No'}",
-        ]
-        return "\n".join(lines)
-    
-    def save_snapshot(self):
-        self.undo_stack.append(copy.deepcopy(self.state))
-        if len(self.undo_stack) > 50:
-            self.undo_stack.pop(0)
-    
-    def undo(self) -> bool:
-        if self.undo_stack:
-            self.state = self.undo_stack.pop()
-            self.persist_to_disk()
-            return True
-        return False
-    
-    def is_solo_batting(self) -> bool:
-        if not self.last_man_can_play:
-            return False
-        return self.state.wickets == self.players_per_team - 1
-    
-    def get_max_wickets_for_innings_end(self) -> int:
-        if self.last_man_can_play:
-            return self.players_per_team
-        else:
-            return self.players_per_team - 1
-    
-    def process_delivery(self, runs_scored: int, is_wide=False, is_noball=False, 
-                        is_wicket=False, runs_from_extra=0):
-        self.save_snapshot()
-        
-        if is_wicket:
-            if self.is_solo_batting():
-                self.state.wickets += 1
-                self.state.ball_history.append("W")
-                if len(self.state.ball_history) > 100:
-                    self.state.ball_history = self.state.ball_history[-100:]
-                self.persist_to_disk()
-                return
-        
-        extra_runs = 0
-        if is_wide and self.wide_gives_runs:
-            extra_runs += 1
-        if is_noball and self.noball_gives_runs:
-            extra_runs += 1
-        
-        extra_runs += runs_from_extra
-        total_runs = runs_scored + extra_runs
-        
-        self.state.score += total_runs
-        self.state.extras += extra_runs
-        
-        is_legal = True
-        if is_wide and not self.wide_counts_as_ball:
-            is_legal = False
-        if is_noball and self.noball_rebowled:
-            is_legal = False
-        
-        if is_legal:
-            self.state.legal_balls += 1
-        
-        bat_stats = self.get_batting_stats()
-        striker = bat_stats[self.state.striker_idx]
-        
-        if not is_wide:
-            if is_legal or is_noball:
-                striker.balls_faced += 1
-            striker.runs += runs_scored
-            if runs_scored == 4:
-                striker.fours += 1
-            elif runs_scored == 6:
-                striker.sixes += 1
-        
-        bowl_stats = self.get_bowling_stats()
-        bowler = bowl_stats[self.state.bowler_idx]
-        
-        bowler.runs_conceded += total_runs
-        if is_legal:
-            bowler.legal_balls_bowled += 1
-        if is_wicket:
-            bowler.wickets += 1
-        
-        if is_wicket:
-            self.state.wickets += 1
-            next_idx = max(self.state.striker_idx, self.state.non_striker_idx) + 1
-            if next_idx < len(bat_stats):
-                self.state.striker_idx = next_idx
-        
-        solo = self.is_solo_batting()
-        
-        if not is_wicket and not solo and runs_scored % 2 != 0:
-            self.state.striker_idx, self.state.non_striker_idx = \
-                self.state.non_striker_idx, self.state.striker_idx
-        
-        if is_legal and self.state.legal_balls % 6 == 0 and not solo:
-            self.state.striker_idx, self.state.non_striker_idx = \
-                self.state.non_striker_idx, self.state.striker_idx
-        
-        if is_wicket:
-            hist = "W"
-        elif is_wide:
-            hist = f"Wd{'+'+str(runs_scored+runs_from_extra) if (runs_scored+runs_from_extra) > 0 else ''}"
-        elif is_noball:
-            hist = f"Nb{'+'+str(runs_scored+runs_from_extra) if (runs_scored+runs_from_extra) > 0 else ''}"
-        else:
-            hist = str(runs_scored)
-        
-        self.state.ball_history.append(hist)
-        
-        if len(self.state.ball_history) > 100:
-            self.state.ball_history = self.state.ball_history[-100:]
-        
-        self.persist_to_disk()
-    
-    def change_bowler(self, new_bowler_idx: int):
-        self.state.bowler_idx = new_bowler_idx
-        self.persist_to_disk()
-    
-    def persist_to_disk(self):
-        innings1_dict = None
-        innings2_dict = None
-        
-        if self.state.innings1_data:
-            innings1_dict = asdict(self.state.innings1_data)
-        if self.state.innings2_data:
-            innings2_dict = asdict(self.state.innings2_data)
-        
-        data = {
-            'setup': {
-                't1_name': self.team1_name,
-                't2_name': self.team2_name,
-                't1_players': self.team1_players,
-                't2_players': self.team2_players,
-                'overs': self.overs,
-                'players': self.players_per_team,
-                'batting': self.batting_team_name,
-                'bowling': self.bowling_team_name,
-                'toss_winner': self.toss_winner,
-                'wd_runs': self.wide_gives_runs,
-                'wd_ball': self.wide_counts_as_ball,
-                'nb_runs': self.noball_gives_runs,
-                'nb_rebowl': self.noball_rebowled,
-                'last_man': self.last_man_can_play,
-            },
-            'state': {
-                'score': self.state.score,
-                'wickets': self.state.wickets,
-                'legal_balls': self.state.legal_balls,
-                'extras': self.state.extras,
-                'striker_idx': self.state.striker_idx,
-                'non_striker_idx': self.state.non_striker_idx,
-                'bowler_idx': self.state.bowler_idx,
-                'current_innings': self.state.current_innings,
-                'target': self.state.target,
-                'innings1_data': innings1_dict,
-                'innings2_data': innings2_dict,
-                'ball_history': self.state.ball_history,
-                'team1_stats': [asdict(p) for p in self.state.team1_stats],
-                'team2_stats': [asdict(p) for p in self.state.team2_stats],
-            }
-        }
-        self.store.put('match', **data)
-    
-    def load_from_disk(self) -> bool:
-        if not self.store.exists('match'):
-            return False
-        
-        try:
-            data = self.store.get('match')
-            
-            s = data['setup']
-            self.team1_name = s['t1_name']
-            self.team2_name = s['t2_name']
-            self.team1_players = s['t1_players']
-            self.team2_players = s['t2_players']
-            self.overs = s['overs']
-            self.players_per_team = s['players']
-            self.batting_team_name = s['batting']
-            self.bowling_team_name = s['bowling']
-            self.toss_winner = s.get('toss_winner', '')
-            
-            self.wide_gives_runs = s.get('wd_runs', True)
-            self.wide_counts_as_ball = s.get('wd_ball', False)
-            self.noball_gives_runs = s.get('nb_runs', True)
-            self.noball_rebowled = s.get('nb_rebowl', True)
-            self.last_man_can_play = s.get('last_man', False)
-            
-            st = data['state']
-            
-            innings1_data = None
-            innings2_data = None
-            
-            if st.get('innings1_data'):
-                innings1_data = InningsData(**st['innings1_data'])
-            if st.get('innings2_data'):
-                innings2_data = InningsData(**st['innings2_data'])
-            
-            self.state = MatchState(
-                score=st['score'],
-                wickets=st['wickets'],
-                legal_balls=st['legal_balls'],
-                extras=st.get('extras', 0),
-                striker_idx=st['striker_idx'],
-                non_striker_idx=st['non_striker_idx'],
-                bowler_idx=st['bowler_idx'],
-                current_innings=st['current_innings'],
-                target=st.get('target'),
-                innings1_data=innings1_data,
-                innings2_data=innings2_data,
-                ball_history=st.get('ball_history', []),
-            )
-            
-            self.state.team1_stats = [PlayerStats(**p) for p in st['team1_stats']]
-            self.state.team2_stats = [PlayerStats(**p) for p in st['team2_stats']]
-            
-            self.is_resumed = True
-            
-            return True
-        except Exception as e:
-            print(f"Load error: {e}")
-            return False
-    
-    def clear_save(self):
-        if self.store.exists('match'):
-            self.store.delete('match')
-        self.is_resumed = False
 
-mgr = MatchManager()
+startup = StartupProfile(STARTUP_T0)
+startup.mark('imports')
 
 # --- UI Screens --- (ONLY UI CHANGES)
 
@@ -373,7 +97,9 @@ class HomeScreen(Screen):
             bold=True,
             color=TEXT_ACCENT
         )
+        title.bind(on_touch_down=self.title_tapped)
         layout.add_widget(title)
+        self.title_taps = []
         
         btn_new = Button(
             text='New Match',
@@ -394,6 +120,14 @@ class HomeScreen(Screen):
         btn_resume.bind(on_press=self.resume_match)
         layout.add_widget(btn_resume)
         
+        btn_live = ToggleButton(
+            text='Live Scoreboard',
+            size_hint_y=HOME_TOGGLE_HEIGHT,
+            font_size=FONT_SMALL
+        )
+        btn_live.bind(state=self.toggle_live)
+        layout.add_widget(btn_live)
+        
         layout.add_widget(Label(size_hint_y=HOME_SPACER_HEIGHT))
         self.add_widget(layout)
 
@@ -406,6 +140,35 @@ class HomeScreen(Screen):
         )
         layout.add_widget(footer)
     
+    def title_tapped(self, instance, touch):
+        """Five taps on the title within three seconds open the diagnostics"""
+        if not instance.collide_point(*touch.pos):
+            return False
+        now = time.monotonic()
+        self.title_taps = [t for t in self.title_taps if now - t < 3] + [now]
+        if len(self.title_taps) >= 5:
+            self.title_taps = []
+            self.manager.current = 'diagnostics'
+        return True
+    
+    def toggle_live(self, instance, state):
+        if state == 'normal':
+            broadcaster.stop()
+            return
+        try:
+            broadcaster.start()
+        except OSError as e:
+            print(f"Broadcast error: {e}")
+            instance.state = 'normal'
+            message = 'Could not start the\nlive scoreboard'
+        else:
+            message = f'Spectators on this network\ncan open\n{broadcaster.url()}'
+        Popup(
+            title='Live Scoreboard',
+            content=Label(text=message, color=TEXT_PRIMARY, halign='center'),
+            size_hint=POPUP_SMALL
+        ).open()
+    
     def new_match(self, instance):
         mgr.reset_config()
         self.manager.current = 'setup'
@@ -700,6 +463,8 @@ class RulesSummaryScreen(Screen):
         ))
         
         rules_text = mgr.get_rules_summary()
+        # Builds (or loads) the par table now, before scoring needs it
+        rules_text += f"\n\nPar score, full innings: {int(mgr.resource_table().full())}"
         
         layout.add_widget(Label(
             text=rules_text,
@@ -726,6 +491,95 @@ class RulesSummaryScreen(Screen):
     def start_match(self, instance):
         self.manager.current = 'scoring'
 
+class OverChart(Widget):
+    """Manhattan (runs in each over) or worm (runs so far) of each innings"""
+    
+    def __init__(self, kind='manhattan', **kwargs):
+        super().__init__(**kwargs)
+        self.kind = kind
+        self.innings = []
+        self.max_overs = 1
+        self.bind(pos=self.redraw, size=self.redraw)
+    
+    def set_innings(self, innings, max_overs):
+        """`innings`: (per-over totals, colour) pairs, as from chart_innings()"""
+        self.innings = innings
+        self.max_overs = max(max_overs, 1)
+        self.redraw()
+    
+    def redraw(self, *args):
+        self.canvas.clear()
+        with self.canvas:
+            Color(*CARD_BG_DARK)
+            Rectangle(pos=self.pos, size=self.size)
+            if self.kind == 'manhattan':
+                self.draw_manhattan()
+            else:
+                self.draw_worm()
+    
+    def draw_manhattan(self):
+        x0, y0 = self.pos
+        w, h = self.size
+        top = max((o.runs for overs, _ in self.innings for o in overs), default=0) or 1
+        slot = w / self.max_overs
+        bar = slot / (len(self.innings) + 1)
+        dot = min(bar, 8)
+        
+        for i, (overs, colour) in enumerate(self.innings):
+            for o in overs:
+                x = x0 + o.number * slot + bar * (i + 0.5)
+                height = (h - 3 * dot) * o.runs / top
+                Color(*colour)
+                Rectangle(pos=(x, y0), size=(bar, height))
+                Color(*DANGER)
+                for k in range(o.wickets):
+                    Ellipse(pos=(x + (bar - dot) / 2, y0 + height + k * dot), size=(dot, dot))
+    
+    def draw_worm(self):
+        x0, y0 = self.pos
+        w, h = self.size
+        top = max((sum(o.runs for o in overs) for overs, _ in self.innings), default=0) or 1
+        dot = 6
+        
+        for overs, colour in self.innings:
+            points = [x0, y0]
+            wickets = []
+            total = 0
+            for o in overs:
+                total += o.runs
+                x = x0 + w * (o.number + o.legal_balls / 6) / self.max_overs
+                y = y0 + (h - dot) * total / top
+                points += [x, y]
+                if o.wickets:
+                    wickets.append((x, y))
+            Color(*colour)
+            Line(points=points, width=1.5)
+            Color(*DANGER)
+            for x, y in wickets:
+                Ellipse(pos=(x - dot / 2, y - dot / 2), size=(dot, dot))
+
+def chart_innings():
+    """(per-over totals, batting side's colour) for each innings so far"""
+    s = mgr.state
+    
+    def colour(team):
+        return INFO if team == mgr.team1_name else WARNING
+    
+    if s.current_innings == 1:
+        return [(s.overs, colour(mgr.batting_team_name))]
+    return [(s.innings1_overs, colour(mgr.bowling_team_name)),
+            (s.overs, colour(mgr.batting_team_name))]
+
+def over_charts(size_hint_y):
+    """Manhattan and worm side by side, drawn from the live per-over totals"""
+    box = BoxLayout(spacing=SPACE_SMALL, size_hint_y=size_hint_y)
+    innings = chart_innings()
+    for kind in ('manhattan', 'worm'):
+        chart = OverChart(kind=kind)
+        chart.set_innings(innings, mgr.overs)
+        box.add_widget(chart)
+    return box
+
 class ScoringScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -803,11 +657,27 @@ class ScoringScreen(Screen):
         )
         btn_nb.bind(on_press=self.handle_noball)
         
+        btn_bulk = Button(
+            text='Over',
+            background_color=BTN_CONTROL,
+            font_size=FONT_MEDIUM
+        )
+        btn_bulk.bind(on_press=self.handle_bulk_entry)
+        
+        btn_games = Button(
+            text='Games',
+            background_color=BTN_CONTROL,
+            font_size=FONT_MEDIUM
+        )
+        btn_games.bind(on_press=self.show_games)
+        
         extras_box.add_widget(btn_wd)
         extras_box.add_widget(btn_nb)
+        extras_box.add_widget(btn_bulk)
+        extras_box.add_widget(btn_games)
         layout.add_widget(extras_box)
         
-        # CONTROLS - Undo, bowler, rules, end
+        # CONTROLS - Undo, redo, bowler, replay, rules, end
         ctrl_box = BoxLayout(spacing=SPACE_SMALL, size_hint_y=SCORING_CONTROLS_HEIGHT)
         
         btn_undo = Button(
@@ -817,6 +687,13 @@ class ScoringScreen(Screen):
         )
         btn_undo.bind(on_press=self.do_undo)
         
+        btn_redo = Button(
+            text='Redo',
+            background_color=BTN_CONTROL,
+            font_size=FONT_NORMAL
+        )
+        btn_redo.bind(on_press=self.do_redo)
+        
         btn_bowler = Button(
             text='Bowler',
             background_color=SECONDARY,
@@ -824,6 +701,13 @@ class ScoringScreen(Screen):
         )
         btn_bowler.bind(on_press=self.change_bowler)
         
+        btn_replay = Button(
+            text='Replay',
+            background_color=BTN_CONTROL,
+            font_size=FONT_NORMAL
+        )
+        btn_replay.bind(on_press=self.show_timeline)
+        
         btn_rules = Button(
             text='Rules',
             background_color=BTN_CONTROL,
@@ -839,7 +723,9 @@ class ScoringScreen(Screen):
         btn_end.bind(on_press=self.end_innings_manual)
         
         ctrl_box.add_widget(btn_undo)
+        ctrl_box.add_widget(btn_redo)
         ctrl_box.add_widget(btn_bowler)
+        ctrl_box.add_widget(btn_replay)
         ctrl_box.add_widget(btn_rules)
         ctrl_box.add_widget(btn_end)
         layout.add_widget(ctrl_box)
@@ -955,6 +841,53 @@ class ScoringScreen(Screen):
         btn_cancel.bind(on_press=popup.dismiss)
         popup.open()
     
+    def handle_bulk_entry(self, instance):
+        content = BoxLayout(orientation='vertical', padding=PAD_MEDIUM, spacing=SPACE_MEDIUM)
+        content.add_widget(Label(
+            text='Balls, e.g. 1 0 4 Wd W Nb+2 6',
+            size_hint_y=0.25,
+            color=TEXT_PRIMARY
+        ))
+        
+        balls_input = TextInput(
+            text='',
+            multiline=False,
+            size_hint_y=0.3,
+            font_size=FONT_MEDIUM
+        )
+        content.add_widget(balls_input)
+        
+        error_lbl = Label(text='', size_hint_y=0.15, color=DANGER)
+        content.add_widget(error_lbl)
+        
+        btn_box = BoxLayout(spacing=SPACE_NORMAL, size_hint_y=0.3)
+        btn_cancel = Button(text='Cancel', background_color=BTN_CONTROL)
+        btn_ok = Button(text='Ok', background_color=SUCCESS)
+        btn_box.add_widget(btn_cancel)
+        btn_box.add_widget(btn_ok)
+        content.add_widget(btn_box)
+        
+        popup = Popup(
+            title='Enter Balls',
+            content=content,
+            size_hint=POPUP_LARGE,
+            auto_dismiss=False
+        )
+        
+        def on_ok(instance):
+            try:
+                mgr.process_deliveries(parse_deliveries(balls_input.text))
+            except ValueError as e:
+                error_lbl.text = str(e)
+                return
+            popup.dismiss()
+            self.update_display()
+            self.check_auto_end()
+        
+        btn_ok.bind(on_press=on_ok)
+        btn_cancel.bind(on_press=popup.dismiss)
+        popup.open()
+    
     def do_undo(self, instance):
         if not mgr.undo_stack:
             Popup(
@@ -976,6 +909,17 @@ class ScoringScreen(Screen):
                 size_hint=POPUP_SMALL
             ).open()
     
+    def do_redo(self, instance):
+        if mgr.redo():
+            self.update_display()
+            self.check_auto_end()
+        else:
+            Popup(
+                title='Cannot Redo',
+                content=Label(text='Nothing to redo.', color=TEXT_PRIMARY),
+                size_hint=POPUP_SMALL
+            ).open()
+    
     def change_bowler(self, instance):
         content = BoxLayout(orientation='vertical', padding=PAD_MEDIUM, spacing=SPACE_SMALL)
         content.add_widget(Label(
@@ -1010,6 +954,68 @@ class ScoringScreen(Screen):
         popup.dismiss()
         self.update_display()
     
+    def show_games(self, instance):
+        """Switch between the matches being scored, or start another"""
+        content = BoxLayout(orientation='vertical', padding=PAD_MEDIUM, spacing=SPACE_SMALL)
+        content.add_widget(Label(
+            text='Select Game:',
+            size_hint_y=0.2,
+            color=TEXT_PRIMARY
+        ))
+        
+        scroll = ScrollView(size_hint_y=0.6)
+        btn_box = BoxLayout(orientation='vertical', spacing=SPACE_SMALL, size_hint_y=None)
+        btn_box.bind(minimum_height=btn_box.setter('height'))
+        
+        for key in registry.keys():
+            btn = Button(
+                text=self.game_label(key),
+                size_hint_y=None,
+                height=BTN_HEIGHT_MEDIUM,
+                background_color=BTN_ACTION if key == registry.active_key else SECONDARY
+            )
+            btn.bind(on_press=lambda x, key=key: self.select_game(key, popup))
+            btn_box.add_widget(btn)
+        
+        scroll.add_widget(btn_box)
+        content.add_widget(scroll)
+        
+        btn_new = Button(
+            text='New Game',
+            size_hint_y=0.2,
+            background_color=BTN_CONTROL
+        )
+        btn_new.bind(on_press=lambda x: self.new_game(popup))
+        content.add_widget(btn_new)
+        
+        popup = Popup(title='Games', content=content, size_hint=POPUP_LARGE)
+        popup.open()
+    
+    def game_label(self, key):
+        m = registry.matches.get(key)
+        if m is None:
+            return f'{key} (saved)'
+        if not m.batting_team_name:
+            return f'{key}: not started'
+        s = m.state
+        return (f'{m.batting_team_name} v {m.bowling_team_name}: '
+                f'{s.score}/{s.wickets} ({s.legal_balls // 6}.{s.legal_balls % 6})')
+    
+    def select_game(self, key, popup):
+        popup.dismiss()
+        switch_match(key)
+        if not mgr.batting_team_name:
+            self.manager.current = 'setup'
+        elif mgr.finished_innings2_data() is not None:
+            self.manager.current = 'result'
+        else:
+            self.update_display()
+    
+    def new_game(self, popup):
+        key = registry.new_key()
+        registry.add(key)
+        self.select_game(key, popup)
+    
     def show_rules(self, instance):
         content = BoxLayout(orientation='vertical', padding=PAD_MEDIUM, spacing=SPACE_MEDIUM)
         
@@ -1034,6 +1040,61 @@ class ScoringScreen(Screen):
         btn.bind(on_press=popup.dismiss)
         popup.open()
     
+    def show_timeline(self, instance):
+        content = BoxLayout(orientation='vertical', padding=PAD_MEDIUM, spacing=SPACE_MEDIUM)
+        
+        point_lbl = Label(
+            text='',
+            size_hint_y=0.6,
+            halign='center',
+            color=TEXT_PRIMARY
+        )
+        content.add_widget(point_lbl)
+        
+        total = mgr.timeline.total_balls()
+        slider = Slider(min=0, max=max(total, 1), value=total, step=1, size_hint_y=0.2)
+        
+        def show_point(instance, value):
+            point_lbl.text = self.timeline_text(int(value))
+        
+        slider.bind(value=show_point)
+        show_point(slider, total)
+        content.add_widget(slider)
+        
+        btn = Button(
+            text='Close',
+            size_hint_y=0.2,
+            background_color=BTN_CONTROL
+        )
+        content.add_widget(btn)
+        
+        popup = Popup(title='Replay', content=content, size_hint=POPUP_LARGE)
+        btn.bind(on_press=popup.dismiss)
+        popup.open()
+    
+    def timeline_text(self, position):
+        innings, ball = mgr.timeline.locate(position)
+        v = mgr.timeline.state_at(innings, ball)
+        
+        if mgr.timeline.batting_is_team1(innings):
+            batting_name, bat_stats, bowl_stats = mgr.team1_name, v.team1, v.team2
+        else:
+            batting_name, bat_stats, bowl_stats = mgr.team2_name, v.team2, v.team1
+        
+        text = (f"Innings {innings}, ball {ball}\n"
+                f"{batting_name} {v.score}/{v.wickets} "
+                f"({v.legal_balls // 6}.{v.legal_balls % 6})\n")
+        if bat_stats:
+            striker = bat_stats[v.striker_idx]
+            text += f"Bat: {striker.name}* ({striker.runs})"
+            if v.non_striker_idx != v.striker_idx and v.non_striker_idx < len(bat_stats):
+                non_striker = bat_stats[v.non_striker_idx]
+                text += f", {non_striker.name} ({non_striker.runs})"
+            text += f" | Bowl: {bowl_stats[v.bowler_idx].name}\n"
+        text += " ".join(v.ball_history(6))
+        return text
+    
+    @instrument.timed('ScoringScreen.update_display')
     def update_display(self):
         s = mgr.state
         
@@ -1051,9 +1112,17 @@ class ScoringScreen(Screen):
                 info += f" | Need {need} in {rem_balls} (RRR: {rrr:.2f})"
             else:
                 info += f" | Need {need} runs"
+            info += f" | Par: {mgr.par_score()}"
         
+        self.info_text = info
         self.info_lbl.text = info
         
+        # The simulation runs on its own thread and fills in the estimate later
+        if s.target and win_worker is not None:
+            spec = chase_spec(mgr)
+            if spec is not None:
+                win_worker.submit(spec, self.on_win_probability)
+        
         bat_stats = mgr.get_batting_stats()
         bowl_stats = mgr.get_bowling_stats()
         
@@ -1068,9 +1137,18 @@ class ScoringScreen(Screen):
                                     f"{non_striker.name} ({non_striker.runs}) | "
                                     f"Bowl: {bowl_stats[s.bowler_idx].name}")
         
-        hist = " ".join(s.ball_history[-18:])
+        hist = " ".join(mgr.recent_balls(18))
         self.history_lbl.text = f"Recent:\n{hist}"
     
+    def on_win_probability(self, spec, probability):
+        Clock.schedule_once(lambda dt: self.show_win_probability(spec, probability))
+    
+    def show_win_probability(self, spec, probability):
+        # Drop estimates for a position that has since changed
+        if probability is None or spec != chase_spec(mgr):
+            return
+        self.info_lbl.text = f"{self.info_text} | Win: {probability:.0%}"
+    
     def check_auto_end(self):
         s = mgr.state
         
@@ -1085,13 +1163,19 @@ class ScoringScreen(Screen):
             return
         
         if s.target and s.score >= s.target:
-            self.manager.current = 'result'
+            # Ending the innings records its figures, which the archive needs
+            self.handle_innings_break()
     
     def end_innings_manual(self, instance):
         content = BoxLayout(orientation='vertical', padding=PAD_LARGE, spacing=SPACE_MEDIUM)
         
+        if mgr.state.current_innings == 1:
+            par_text = f"Revised target (par): {mgr.revised_target()}"
+        else:
+            par_text = f"Par score now: {mgr.par_score()}"
+        
         content.add_widget(Label(
-            text='End this innings?\n\nThis cannot be undone.',
+            text=f'End this innings?\n\n{par_text}\n\nThis cannot be undone.',
             font_size=FONT_NORMAL,
             size_hint_y=0.6,
             color=TEXT_PRIMARY
@@ -1129,35 +1213,10 @@ class ScoringScreen(Screen):
         self.handle_innings_break()
     
     def handle_innings_break(self):
+        mgr.end_innings()
         s = mgr.state
         
-        if s.current_innings == 1:
-            mgr.state.innings1_data = InningsData(
-                score=s.score,
-                wickets=s.wickets,
-                legal_balls=s.legal_balls,
-                extras=s.extras
-            )
-            
-            mgr.undo_stack = []
-            
-            s.target = s.score + 1
-            s.current_innings = 2
-            
-            s.score = 0
-            s.wickets = 0
-            s.legal_balls = 0
-            s.extras = 0
-            s.ball_history = []
-            s.striker_idx = 0
-            s.non_striker_idx = 1
-            s.bowler_idx = 0
-            
-            mgr.batting_team_name, mgr.bowling_team_name = \
-                mgr.bowling_team_name, mgr.batting_team_name
-            
-            mgr.persist_to_disk()
-            
+        if s.innings2_data is None:
             Popup(
                 title='Innings Break',
                 content=Label(
@@ -1170,38 +1229,34 @@ class ScoringScreen(Screen):
             
             self.update_display()
         else:
-            mgr.state.innings2_data = InningsData(
-                score=s.score,
-                wickets=s.wickets,
-                legal_balls=s.legal_balls,
-                extras=s.extras
-            )
-            mgr.persist_to_disk()
             self.manager.current = 'result'
 
 class ResultScreen(Screen):
     def on_enter(self):
+        mgr.archive_match()
+        self.fixture_text = self.record_in_tournament()
         self.clear_widgets()
         self.build_ui()
     
+    def record_in_tournament(self):
+        """Enter the match against its fixture in the saved tournament, if any"""
+        path = os.path.join(registry.data_dir, TOURNAMENT_FILE)
+        tournament = Tournament.load(path)
+        if tournament is None:
+            return ''
+        fixture = tournament.fixture_of(mgr.match_uid)
+        if fixture is None:
+            fixture = tournament.record_match(mgr)
+            if fixture is None:
+                return ''
+            tournament.save(path)
+        return f"{tournament.name}: fixture {fixture.number} recorded"
+    
     def build_ui(self):
         layout = BoxLayout(orientation='vertical', padding=PAD_LARGE, spacing=SPACE_LARGE)
         
-        s = mgr.state
-        
-        winner_text = "Match Drawn"
-        winner_color = TEXT_SECONDARY
-        
-        if s.target:
-            if s.score >= s.target:
-                winner_text = f"{mgr.batting_team_name} Wins!"
-                winner_color = SUCCESS
-            elif s.score == s.target - 1:
-                winner_text = "Match Tied!"
-                winner_color = WARNING
-            else:
-                winner_text = f"{mgr.bowling_team_name} Wins!"
-                winner_color = SUCCESS
+        winner_text, outcome = mgr.get_result()
+        winner_color = {'win': SUCCESS, 'tie': WARNING}.get(outcome, TEXT_SECONDARY)
         
         layout.add_widget(Label(
             text='Match Complete',
@@ -1220,6 +1275,8 @@ class ResultScreen(Screen):
         ))
         
         score_text = self.get_score_summary()
+        if self.fixture_text:
+            score_text += f"\n{self.fixture_text}"
         layout.add_widget(Label(
             text=score_text,
             font_size=FONT_MEDIUM,
@@ -1261,86 +1318,42 @@ class ResultScreen(Screen):
         btn_box.add_widget(btn_home)
         
         layout.add_widget(btn_box)
-        layout.add_widget(Label(size_hint_y=RESULT_SPACER_HEIGHT))
+        layout.add_widget(over_charts(RESULT_CHARTS_HEIGHT))
         
         self.add_widget(layout)
     
     def get_score_summary(self):
-        s = mgr.state
-        
-        if mgr.batting_team_name == mgr.team1_name:
-            inn1_team = mgr.team2_name
-            inn2_team = mgr.team1_name
-        else:
-            inn1_team = mgr.team1_name
-            inn2_team = mgr.team2_name
-        
-        if s.innings1_data:
-            inn1_text = f"{inn1_team}: {s.innings1_data.score}/{s.innings1_data.wickets} ({s.innings1_data.overs_str()})"
-        else:
-            inn1_text = f"{inn1_team}: Data not available"
-        
-        if s.innings2_data:
-            inn2_text = f"{inn2_team}: {s.innings2_data.score}/{s.innings2_data.wickets} ({s.innings2_data.overs_str()})"
-        else:
-            inn2_text = f"{inn2_team}: {s.score}/{s.wickets} ({s.legal_balls//6}.{s.legal_balls%6})"
-        
-        return f"{inn1_text}\n{inn2_text}"
+        return mgr.get_score_summary()
     
     def get_player_of_match(self):
-        all_players = mgr.state.team1_stats + mgr.state.team2_stats
-        
-        best_player = None
-        best_score = -1
-        best_reason = ""
-        
-        for p in all_players:
-            if p.balls_faced == 0 and p.legal_balls_bowled == 0:
-                continue
-            
-            score = 0
-            reasons = []
-            
-            if p.runs > 0:
-                score += p.runs
-                reasons.append(f"{p.runs} runs")
-                
-                if p.balls_faced >= 10 and p.strike_rate() > 150:
-                    bonus = p.runs * 0.5
-                    score += bonus
-                    reasons.append(f"SR {p.strike_rate():.1f}")
-            
-            if p.wickets > 0:
-                wicket_points = p.wickets * 25
-                score += wicket_points
-                reasons.append(f"{p.wickets} wkts")
-                
-                overs = p.legal_balls_bowled / 6
-                if overs >= 2 and p.economy() < 6:
-                    score += 10
-                    reasons.append(f"eco {p.economy():.1f}")
-            
-            if score > best_score:
-                best_score = score
-                best_player = p
-                best_reason = ", ".join(reasons)
-        
-        if best_player:
-            return best_player.name, best_reason
-        else:
-            return "No outstanding performance", ""
+        return mgr.get_player_of_match()
     
     def show_stats(self, instance):
         self.manager.current = 'stats'
     
     def new_match(self, instance):
-        mgr.reset_config()
-        mgr.clear_save()
+        if registry.active_key == registry.MAIN:
+            mgr.reset_config()
+            mgr.clear_save()
+        else:
+            # The next side match starts afresh in its own directory
+            self.close_match()
+            key = registry.new_key()
+            registry.add(key)
+            switch_match(key)
         self.manager.current = 'setup'
     
     def go_home(self, instance):
-        mgr.clear_save()
+        self.close_match()
         self.manager.current = 'home'
+    
+    def close_match(self):
+        """Drop the finished match's save; a side match leaves Games altogether"""
+        if registry.active_key == registry.MAIN:
+            mgr.clear_save()
+        else:
+            registry.remove(registry.active_key)
+            switch_match(registry.MAIN)
 
 class StatsScreen(Screen):
     def on_enter(self):
@@ -1358,13 +1371,56 @@ class StatsScreen(Screen):
             color=TEXT_PRIMARY
         ))
         
+        # Scrubber over every ball of the match; the end shows the live state
+        total = mgr.timeline.total_balls()
+        scrub_box = BoxLayout(spacing=SPACE_SMALL, size_hint_y=STATS_SCRUBBER_HEIGHT)
+        self.point_lbl = Label(
+            text='',
+            font_size=FONT_SMALL,
+            size_hint_x=0.35,
+            color=TEXT_SECONDARY
+        )
+        slider = Slider(min=0, max=max(total, 1), value=total, step=1, size_hint_x=0.65)
+        slider.bind(value=lambda instance, value: self.show_point(int(value)))
+        scrub_box.add_widget(self.point_lbl)
+        scrub_box.add_widget(slider)
+        layout.add_widget(scrub_box)
+        
+        layout.add_widget(over_charts(STATS_CHARTS_HEIGHT))
+        
         scroll = ScrollView(size_hint_y=STATS_CONTENT_HEIGHT)
-        stats_layout = BoxLayout(
+        self.stats_layout = BoxLayout(
             orientation='vertical',
             spacing=SPACE_MEDIUM,
             size_hint_y=None
         )
-        stats_layout.bind(minimum_height=stats_layout.setter('height'))
+        self.stats_layout.bind(minimum_height=self.stats_layout.setter('height'))
+        self.show_point(total)
+        
+        scroll.add_widget(self.stats_layout)
+        layout.add_widget(scroll)
+        
+        btn_back = Button(
+            text='Back to Result',
+            size_hint_y=STATS_BUTTON_HEIGHT,
+            background_color=BTN_CONTROL,
+            font_size=FONT_MEDIUM
+        )
+        btn_back.bind(on_press=lambda x: setattr(self.manager, 'current', 'result'))
+        layout.add_widget(btn_back)
+        
+        self.add_widget(layout)
+    
+    def show_point(self, position):
+        """Fill in the player figures as they stood after `position` balls"""
+        innings, ball = mgr.timeline.locate(position)
+        v = mgr.timeline.state_at(innings, ball)
+        self.point_lbl.text = (f"Inn {innings}, ball {ball}: "
+                               f"{v.score}/{v.wickets} ({v.legal_balls // 6}.{v.legal_balls % 6})")
+        
+        stats_layout = self.stats_layout
+        stats_layout.clear_widgets()
+        team1_innings = 1 if mgr.timeline.batting_is_team1(1) else 2
         
         # Team 1 batting
         stats_layout.add_widget(Label(
@@ -1375,7 +1431,7 @@ class StatsScreen(Screen):
             color=INFO
         ))
         
-        for p in mgr.state.team1_stats:
+        for p in v.team1:
             if p.balls_faced > 0:
                 txt = f"{p.name}: {p.runs}({p.balls_faced})"
                 if p.fours > 0 or p.sixes > 0:
@@ -1388,6 +1444,8 @@ class StatsScreen(Screen):
                     color=TEXT_SECONDARY
                 ))
         
+        self.add_partnerships(v, team1_innings, v.team1)
+        
         # Team 1 bowling
         stats_layout.add_widget(Label(
             text=f'[b]{mgr.team1_name} - Bowling[/b]',
@@ -1397,7 +1455,7 @@ class StatsScreen(Screen):
             color=INFO
         ))
         
-        for p in mgr.state.team1_stats:
+        for p in v.team1:
             if p.legal_balls_bowled > 0:
                 overs = p.legal_balls_bowled // 6
                 balls = p.legal_balls_bowled % 6
@@ -1421,7 +1479,7 @@ class StatsScreen(Screen):
             color=WARNING
         ))
         
-        for p in mgr.state.team2_stats:
+        for p in v.team2:
             if p.balls_faced > 0:
                 txt = f"{p.name}: {p.runs}({p.balls_faced})"
                 if p.fours > 0 or p.sixes > 0:
@@ -1434,6 +1492,8 @@ class StatsScreen(Screen):
                     color=TEXT_SECONDARY
                 ))
         
+        self.add_partnerships(v, 3 - team1_innings, v.team2)
+        
         # Team 2 bowling
         stats_layout.add_widget(Label(
             text=f'[b]{mgr.team2_name} - Bowling[/b]',
@@ -1443,7 +1503,7 @@ class StatsScreen(Screen):
             color=WARNING
         ))
         
-        for p in mgr.state.team2_stats:
+        for p in v.team2:
             if p.legal_balls_bowled > 0:
                 overs = p.legal_balls_bowled // 6
                 balls = p.legal_balls_bowled % 6
@@ -1455,37 +1515,192 @@ class StatsScreen(Screen):
                     height=30,
                     color=TEXT_SECONDARY
                 ))
+    
+    
+    def add_partnerships(self, v, innings, batters):
+        """Stands and falls of wickets, kept by the manager as the balls were scored"""
+        falls = mgr.get_falls(innings, v)
+        for stand in mgr.get_partnerships(innings, v):
+            names = batters[stand.batter_idx].name
+            if stand.partner_idx >= 0:
+                names += f" & {batters[stand.partner_idx].name}"
+            txt = f"{stand.number}. {names}: {stand.runs}({stand.legal_balls})"
+            if stand.unbroken:
+                txt += " *"
+            else:
+                fow = falls[stand.number - 1]
+                txt += f"  FoW {fow.score}-{stand.number} ({fow.overs_str()})"
+            self.stats_layout.add_widget(Label(
+                text=txt,
+                size_hint_y=None,
+                height=30,
+                color=TEXT_SECONDARY
+            ))
+
+class DiagnosticsScreen(Screen):
+    """Latency histograms of the scoring hot path"""
+    
+    def on_enter(self):
+        self.clear_widgets()
+        self.build_ui()
+    
+    def build_ui(self):
+        layout = BoxLayout(orientation='vertical', padding=PAD_NORMAL, spacing=SPACE_MEDIUM)
+        
+        layout.add_widget(Label(
+            text='Diagnostics',
+            font_size=FONT_LARGE,
+            bold=True,
+            size_hint_y=DIAG_HEADER_HEIGHT,
+            color=TEXT_PRIMARY
+        ))
         
-        scroll.add_widget(stats_layout)
+        controls = BoxLayout(spacing=SPACE_SMALL, size_hint_y=DIAG_CONTROLS_HEIGHT)
+        btn_record = ToggleButton(
+            text='Recording',
+            state='down' if instrument.is_enabled() else 'normal',
+            font_size=FONT_SMALL
+        )
+        btn_record.bind(state=self.toggle_recording)
+        controls.add_widget(btn_record)
+        
+        btn_reset = Button(text='Reset', background_color=BTN_CONTROL, font_size=FONT_SMALL)
+        btn_reset.bind(on_press=self.reset_histograms)
+        controls.add_widget(btn_reset)
+        
+        btn_export = Button(text='Export', background_color=BTN_ACTION, font_size=FONT_SMALL)
+        btn_export.bind(on_press=self.export_histograms)
+        controls.add_widget(btn_export)
+        layout.add_widget(controls)
+        
+        scroll = ScrollView(size_hint_y=DIAG_CONTENT_HEIGHT)
+        self.report_lbl = Label(
+            text='',
+            font_size=FONT_SMALL,
+            color=TEXT_SECONDARY,
+            size_hint_y=None,
+            halign='left',
+            valign='top'
+        )
+        self.report_lbl.bind(
+            width=lambda instance, width: setattr(instance, 'text_size', (width, None)),
+            texture_size=lambda instance, size: setattr(instance, 'height', size[1])
+        )
+        scroll.add_widget(self.report_lbl)
         layout.add_widget(scroll)
+        self.show_report()
         
         btn_back = Button(
-            text='Back to Result',
-            size_hint_y=STATS_BUTTON_HEIGHT,
+            text='Back',
+            size_hint_y=DIAG_BUTTON_HEIGHT,
             background_color=BTN_CONTROL,
             font_size=FONT_MEDIUM
         )
-        btn_back.bind(on_press=lambda x: setattr(self.manager, 'current', 'result'))
+        btn_back.bind(on_press=lambda x: setattr(self.manager, 'current', 'home'))
         layout.add_widget(btn_back)
         
         self.add_widget(layout)
+    
+    def show_report(self):
+        lines = instrument.report_lines()
+        if not lines:
+            lines = ['No calls recorded yet.' if instrument.is_enabled()
+                     else 'Recording is off. Switch it on, score a few balls, then come back.']
+        self.report_lbl.text = '\n\n'.join(lines)
+    
+    def toggle_recording(self, instance, state):
+        if state == 'down':
+            instrument.enable()
+        else:
+            instrument.disable()
+        self.show_report()
+    
+    def reset_histograms(self, instance):
+        instrument.reset()
+        self.show_report()
+    
+    def export_histograms(self, instance):
+        path = os.path.join(registry.data_dir, 'score247_latency.json')
+        if instrument.export(path):
+            message = f'Saved to\n{path}'
+        else:
+            message = 'Could not save the histograms'
+        Popup(
+            title='Export',
+            content=Label(text=message, color=TEXT_PRIMARY),
+            size_hint=POPUP_SMALL
+        ).open()
+
+class LazyScreenManager(ScreenManager):
+    """ScreenManager that builds each registered screen the first time it is needed"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+    
+    def register(self, name, screen_class):
+        self.factories[name] = screen_class
+    
+    def build_screen(self, name):
+        screen_class = self.factories.pop(name, None)
+        if screen_class is not None:
+            self.add_widget(screen_class(name=name))
+    
+    def get_screen(self, name):
+        self.build_screen(name)
+        return super().get_screen(name)
+    
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
 
 class CricketApp(App):
     def build(self):
         Window.clearcolor = BG_DARK
         self.title = 'Score247'
         
-        sm = ScreenManager()
+        sm = LazyScreenManager()
         sm.add_widget(HomeScreen(name='home'))
-        sm.add_widget(SetupScreen(name='setup'))
-        sm.add_widget(PlayerNamesScreen(name='players'))
-        sm.add_widget(TossScreen(name='toss'))
-        sm.add_widget(RulesSummaryScreen(name='rules_summary'))
-        sm.add_widget(ScoringScreen(name='scoring'))
-        sm.add_widget(ResultScreen(name='result'))
-        sm.add_widget(StatsScreen(name='stats'))
-        
+        sm.register('setup', SetupScreen)
+        sm.register('players', PlayerNamesScreen)
+        sm.register('toss', TossScreen)
+        sm.register('rules_summary', RulesSummaryScreen)
+        sm.register('scoring', ScoringScreen)
+        sm.register('result', ResultScreen)
+        sm.register('stats', StatsScreen)
+        sm.register('diagnostics', DiagnosticsScreen)
+        
+        registry.start_writers()
+        
+        global win_worker
+        if winprob.available():
+            win_worker = WinProbabilityWorker()
+        
+        startup.mark('build')
+        Window.bind(on_flip=self.on_first_frame)
         return sm
+    
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        startup.mark('first frame')
+        startup.report()
+        
+        if PREWARM_SCORING_DELAY is not None:
+            Clock.schedule_once(self.prewarm_scoring, PREWARM_SCORING_DELAY)
+    
+    def prewarm_scoring(self, dt):
+        self.root.build_screen('scoring')
+        startup.mark('scoring prewarmed')
+        startup.report()
+    
+    def on_pause(self):
+        registry.flush()
+        return True
+    
+    def on_stop(self):
+        registry.stop_writers()
+        broadcaster.stop()
+        if win_worker is not None:
+            win_worker.stop()
 
 if __name__ == '__main__':
     CricketApp().run()
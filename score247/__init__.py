@@ -0,0 +1,41 @@
+"""Score247 scoring engine.
+
+Pure-Python match models and rules, importable without Kivy. Nothing here
+touches the disk until a MatchManager is created.
+"""
+
+from .archive import MatchArchive
+from .careers import CareerStats
+from .manager import MatchManager
+from .models import (PLAYER_FIELDS, DeliveryDelta, FallOfWicket, InningsData, MatchState,
+                     OverStats, Partnership, PlayerStats, players_from_rows)
+from .registry import MatchRegistry
+from .storage import CheckpointStore, JsonFileStore
+from .timeline import MatchTimeline
+from .tournament import Tournament
+from .versions import PlayerRecord, StateHistory, StateVersion
+from .writer import PersistWorker
+
+__all__ = [
+    'PLAYER_FIELDS',
+    'CareerStats',
+    'CheckpointStore',
+    'DeliveryDelta',
+    'FallOfWicket',
+    'InningsData',
+    'JsonFileStore',
+    'MatchArchive',
+    'MatchManager',
+    'MatchRegistry',
+    'MatchState',
+    'MatchTimeline',
+    'OverStats',
+    'Partnership',
+    'PersistWorker',
+    'PlayerRecord',
+    'PlayerStats',
+    'StateHistory',
+    'StateVersion',
+    'Tournament',
+    'players_from_rows',
+]
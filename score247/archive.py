@@ -0,0 +1,441 @@
+"""Archive of finished matches in a local SQLite database"""
+
+import heapq
+import sqlite3
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from .careers import CAREER_FIELDS, PLACEHOLDER_GLOB, CareerStats, career_row, is_placeholder
+from .models import PlayerStats
+from .notation import EXTRA_NOBALL, EXTRA_NONE, EXTRA_WIDE, ball_codes, decode_ball
+
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    played_at TEXT NOT NULL,
+    team1 TEXT NOT NULL,
+    team2 TEXT NOT NULL,
+    overs INTEGER NOT NULL,
+    players_per_team INTEGER NOT NULL,
+    toss_winner TEXT,
+    result TEXT,
+    outcome TEXT
+);
+CREATE TABLE IF NOT EXISTS innings (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    number INTEGER NOT NULL,
+    batting_team TEXT NOT NULL,
+    bowling_team TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    wickets INTEGER NOT NULL,
+    legal_balls INTEGER NOT NULL,
+    extras INTEGER NOT NULL,
+    PRIMARY KEY (match_id, number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS player_innings (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    innings INTEGER NOT NULL,
+    team TEXT NOT NULL,
+    player TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    batted INTEGER NOT NULL,
+    runs INTEGER NOT NULL,
+    balls_faced INTEGER NOT NULL,
+    fours INTEGER NOT NULL,
+    sixes INTEGER NOT NULL,
+    bowled INTEGER NOT NULL,
+    wickets INTEGER NOT NULL,
+    runs_conceded INTEGER NOT NULL,
+    legal_balls_bowled INTEGER NOT NULL,
+    dismissed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (match_id, innings, team, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS deliveries (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    innings INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    legal_ball INTEGER NOT NULL,
+    batter TEXT NOT NULL,
+    bowler TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    extra_type INTEGER NOT NULL,  -- notation.EXTRA_*
+    extra_runs INTEGER NOT NULL,
+    wicket INTEGER NOT NULL,
+    PRIMARY KEY (match_id, innings, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS careers (
+    name TEXT PRIMARY KEY,
+    matches INTEGER NOT NULL,
+    innings INTEGER NOT NULL,
+    not_outs INTEGER NOT NULL,
+    runs INTEGER NOT NULL,
+    balls_faced INTEGER NOT NULL,
+    fours INTEGER NOT NULL,
+    sixes INTEGER NOT NULL,
+    high_score INTEGER NOT NULL,
+    high_score_not_out INTEGER NOT NULL,
+    bowling_innings INTEGER NOT NULL,
+    wickets INTEGER NOT NULL,
+    runs_conceded INTEGER NOT NULL,
+    legal_balls_bowled INTEGER NOT NULL,
+    best_wickets INTEGER NOT NULL,
+    best_runs INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS matches_played_at ON matches (played_at);
+CREATE INDEX IF NOT EXISTS matches_teams ON matches (team1, team2, played_at);
+CREATE INDEX IF NOT EXISTS matches_team1 ON matches (team1, played_at);
+CREATE INDEX IF NOT EXISTS matches_team2 ON matches (team2, played_at);
+CREATE INDEX IF NOT EXISTS player_innings_player ON player_innings (player, match_id);
+CREATE INDEX IF NOT EXISTS player_innings_team ON player_innings (team, match_id);
+CREATE INDEX IF NOT EXISTS player_innings_runs ON player_innings (runs) WHERE batted;
+"""
+
+# Steps from one schema version to the next; SCHEMA then adds any new tables
+MIGRATIONS = {
+    2: """
+ALTER TABLE player_innings ADD COLUMN dismissed INTEGER NOT NULL DEFAULT 0;
+UPDATE player_innings SET dismissed = EXISTS (
+    SELECT 1 FROM deliveries d
+    WHERE d.match_id = player_innings.match_id AND d.innings = player_innings.innings
+      AND d.batter = player_innings.player AND d.wicket
+) WHERE batted;
+""",
+    # Only the high-score index, which SCHEMA creates
+    3: "",
+    # Careers leave out placeholder names; rebuilt once the steps have run
+    4: "",
+}
+
+PLAYER_INNINGS_COLUMNS = (
+    'match_id', 'innings', 'team', 'player', 'position',
+    'batted', 'dismissed', 'runs', 'balls_faced', 'fours', 'sixes',
+    'bowled', 'wickets', 'runs_conceded', 'legal_balls_bowled',
+)
+
+
+class MatchArchive:
+    """Every finished match: matches, innings, player innings and deliveries.
+    
+    Each match goes in with a single transaction, keyed by the match uid,
+    so archiving the same match twice is harmless. The indexes cover the
+    lookups the app makes (by player, by team or pair of teams, newest
+    first), which keeps them proportional to the rows they return rather
+    than to the size of the archive.
+    
+    Career figures live in their own table, updated in the same
+    transaction as each new match, and are held in a dict once loaded so a
+    player lookup is a single dict access. Players left with a placeholder
+    name ("Player 1") are archived with their matches but have no career
+    and stay off the leaderboards.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self._careers = None
+        # Leaderboard results by query, until the next match is archived
+        self._boards = {}
+        
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION:
+            with self.db:
+                if version > 0:
+                    for step in range(version + 1, SCHEMA_VERSION + 1):
+                        self.db.executescript(MIGRATIONS[step])
+                self.db.executescript(SCHEMA)
+                self.db.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+            if version > 0:
+                self.rebuild_careers()
+    
+    def close(self):
+        self.db.close()
+    
+    def has_match(self, uid: str) -> bool:
+        return self.db.execute('SELECT 1 FROM matches WHERE uid = ?', (uid,)).fetchone() is not None
+    
+    def add_match(self, mgr) -> bool:
+        """Archive the manager's finished match; False if it is already archived"""
+        if self.has_match(mgr.match_uid):
+            return False
+        
+        result, outcome = mgr.get_result()
+        timeline = mgr.timeline
+        innings_data = {1: mgr.state.innings1_data, 2: mgr.finished_innings2_data()}
+        
+        careers = self.careers()
+        touched: Dict[str, CareerStats] = {}
+        
+        with self.db:
+            cur = self.db.execute(
+                'INSERT INTO matches (uid, played_at, team1, team2, overs, players_per_team,'
+                ' toss_winner, result, outcome) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (mgr.match_uid, mgr.started_at, mgr.team1_name, mgr.team2_name, mgr.overs,
+                 mgr.players_per_team, mgr.toss_winner, result, outcome))
+            match_id = cur.lastrowid
+            
+            for number in (1, 2):
+                data = innings_data[number]
+                if data is None:
+                    continue
+                
+                if timeline.batting_is_team1(number):
+                    batting, bowling = mgr.team1_name, mgr.team2_name
+                else:
+                    batting, bowling = mgr.team2_name, mgr.team1_name
+                self.db.execute(
+                    'INSERT INTO innings VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (match_id, number, batting, bowling, data.score, data.wickets,
+                     data.legal_balls, data.extras))
+                
+                deliveries, dismissed = self._delivery_rows(match_id, number, timeline)
+                players = self._player_rows(match_id, number, batting, bowling, timeline,
+                                            dismissed)
+                self.db.executemany(
+                    'INSERT INTO deliveries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', deliveries)
+                self.db.executemany(
+                    f'INSERT INTO player_innings ({", ".join(PLAYER_INNINGS_COLUMNS)})'
+                    f' VALUES ({", ".join(":" + c for c in PLAYER_INNINGS_COLUMNS)})', players)
+                
+                for row in players:
+                    if is_placeholder(row['player']):
+                        continue
+                    career = touched.get(row['player'])
+                    if career is None:
+                        known = careers.get(row['player'])
+                        career = replace(known) if known else CareerStats(row['player'])
+                        career.matches += 1
+                        touched[career.name] = career
+                    career.add_innings(row)
+            
+            self.db.executemany(self._career_upsert(), map(career_row, touched.values()))
+        
+        # Only once the transaction has gone through
+        careers.update(touched)
+        self._boards.clear()
+        return True
+    
+    def _player_rows(self, match_id, number, batting, bowling, timeline,
+                     dismissed) -> List[dict]:
+        v = timeline.state_at(number, timeline.innings_length(number))
+        if timeline.batting_is_team1(number):
+            bat_stats, bowl_stats = v.team1, v.team2
+        else:
+            bat_stats, bowl_stats = v.team2, v.team1
+        
+        # Everyone up to the last batter in had a bat, out or not
+        last_in = max(v.striker_idx, v.non_striker_idx)
+        rows = []
+        for position, p in enumerate(bat_stats):
+            batted = position <= last_in or p.balls_faced > 0
+            rows.append(dict(
+                match_id=match_id, innings=number, team=batting, player=p.name,
+                position=position, batted=int(batted), dismissed=int(position in dismissed),
+                runs=p.runs, balls_faced=p.balls_faced, fours=p.fours, sixes=p.sixes,
+                bowled=0, wickets=0, runs_conceded=0, legal_balls_bowled=0))
+        for position, p in enumerate(bowl_stats):
+            bowled = p.legal_balls_bowled > 0 or p.runs_conceded > 0
+            rows.append(dict(
+                match_id=match_id, innings=number, team=bowling, player=p.name,
+                position=position, batted=0, dismissed=0,
+                runs=0, balls_faced=0, fours=0, sixes=0,
+                bowled=int(bowled), wickets=p.wickets, runs_conceded=p.runs_conceded,
+                legal_balls_bowled=p.legal_balls_bowled))
+        return rows
+    
+    def _delivery_rows(self, match_id, number, timeline):
+        """Delivery rows, and the batting positions dismissed in the innings"""
+        batting_is_team1 = timeline.batting_is_team1(number)
+        rows = []
+        dismissed = set()
+        # Each ball with the state just before it, which names the batter
+        for seq, (code, before) in enumerate(zip(ball_codes(timeline.stream(number)),
+                                                 timeline.states(number)), 1):
+            runs, is_wide, is_noball, is_wicket, extra_runs, bowler_idx = decode_ball(code)
+            bat_stats, bowl_stats = ((before.team1, before.team2) if batting_is_team1
+                                     else (before.team2, before.team1))
+            extra_type = EXTRA_WIDE if is_wide else EXTRA_NOBALL if is_noball else EXTRA_NONE
+            rows.append((match_id, number, seq, before.legal_balls,
+                         bat_stats[before.striker_idx].name, bowl_stats[bowler_idx].name,
+                         runs, extra_type, extra_runs, int(is_wicket)))
+            if is_wicket:
+                dismissed.add(before.striker_idx)
+        return rows, dismissed
+    
+    # --- Careers ---
+    
+    @staticmethod
+    def _career_upsert() -> str:
+        return (f'INSERT OR REPLACE INTO careers ({", ".join(CAREER_FIELDS)})'
+                f' VALUES ({", ".join("?" * len(CAREER_FIELDS))})')
+    
+    def careers(self) -> Dict[str, CareerStats]:
+        """Every player's career figures by name, loaded on first use"""
+        if self._careers is None:
+            self._careers = {
+                row['name']: CareerStats(*row)
+                for row in self.db.execute(f'SELECT {", ".join(CAREER_FIELDS)} FROM careers')
+            }
+        return self._careers
+    
+    def career(self, player: str) -> Optional[CareerStats]:
+        return self.careers().get(player)
+    
+    def rebuild_careers(self):
+        """Recompute every career from the archived player innings"""
+        careers: Dict[str, CareerStats] = {}
+        last_match = {}
+        for row in self.db.execute('SELECT * FROM player_innings ORDER BY match_id, innings'):
+            if is_placeholder(row['player']):
+                continue
+            career = careers.get(row['player'])
+            if career is None:
+                career = careers[row['player']] = CareerStats(row['player'])
+            if last_match.get(career.name) != row['match_id']:
+                last_match[career.name] = row['match_id']
+                career.matches += 1
+            career.add_innings(row)
+        
+        with self.db:
+            self.db.execute('DELETE FROM careers')
+            self.db.executemany(self._career_upsert(), map(career_row, careers.values()))
+        self._careers = careers
+        self._boards.clear()
+    
+    # --- Leaderboards ---
+    #
+    # Whole-archive boards pick the top k straight from the career index
+    # with a heap, O(players log k). Filtered boards aggregate only the
+    # rows the date/team filter selects (both are indexed), then do the
+    # same. Highest scores walk the runs index from the top and stop after
+    # k rows. None of them sorts the archive.
+    
+    def most_runs(self, k: int = 10, since: Optional[str] = None, until: Optional[str] = None,
+                  team: Optional[str] = None) -> List[Tuple[str, int]]:
+        return self._cached('runs', k, since, until, team, lambda: [
+            (p.name, p.runs) for p in heapq.nlargest(
+                k, self._totals(since, until, team), key=lambda p: p.runs) if p.runs > 0])
+    
+    def most_sixes(self, k: int = 10, since: Optional[str] = None, until: Optional[str] = None,
+                   team: Optional[str] = None) -> List[Tuple[str, int]]:
+        return self._cached('sixes', k, since, until, team, lambda: [
+            (p.name, p.sixes) for p in heapq.nlargest(
+                k, self._totals(since, until, team), key=lambda p: p.sixes) if p.sixes > 0])
+    
+    def best_economy(self, k: int = 10, min_overs: int = 5, since: Optional[str] = None,
+                     until: Optional[str] = None,
+                     team: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Lowest economy among bowlers with at least `min_overs` overs"""
+        min_balls = max(min_overs * 6, 1)
+        return self._cached(('economy', min_balls), k, since, until, team, lambda: [
+            (p.name, p.economy()) for p in heapq.nsmallest(
+                k, (p for p in self._totals(since, until, team)
+                    if p.legal_balls_bowled >= min_balls),
+                key=lambda p: p.economy())])
+    
+    def highest_scores(self, k: int = 10, since: Optional[str] = None,
+                       until: Optional[str] = None,
+                       team: Optional[str] = None) -> List[Tuple[str, int, bool, str]]:
+        """Best single innings: (player, runs, not out, date played)"""
+        def query():
+            where, args = self._filters(since, until, team)
+            rows = self.db.execute(
+                'SELECT p.player, p.runs, p.dismissed, m.played_at FROM player_innings p'
+                ' JOIN matches m ON m.id = p.match_id'
+                f' WHERE p.batted AND p.player NOT GLOB ?{where} ORDER BY p.runs DESC LIMIT ?',
+                [PLACEHOLDER_GLOB] + args + [k])
+            return [(r['player'], r['runs'], not r['dismissed'], r['played_at']) for r in rows]
+        return self._cached('high_score', k, since, until, team, query)
+    
+    def _cached(self, board, k, since, until, team, compute) -> list:
+        key = (board, k, since, until, team)
+        result = self._boards.get(key)
+        if result is None:
+            result = self._boards[key] = compute()
+        return result
+    
+    @staticmethod
+    def _filters(since, until, team) -> Tuple[str, list]:
+        """Extra WHERE terms (dates as ISO text: since inclusive, until exclusive)"""
+        where, args = '', []
+        if since is not None:
+            where += ' AND m.played_at >= ?'
+            args.append(since)
+        if until is not None:
+            where += ' AND m.played_at < ?'
+            args.append(until)
+        if team is not None:
+            where += ' AND p.team = ?'
+            args.append(team)
+        return where, args
+    
+    def _totals(self, since, until, team):
+        """Per-player totals under the filters; the career index when there are none"""
+        if since is None and until is None and team is None:
+            return self.careers().values()
+        
+        where, args = self._filters(since, until, team)
+        rows = self.db.execute(
+            'SELECT p.player, SUM(p.runs), SUM(p.sixes), SUM(p.runs_conceded),'
+            ' SUM(p.legal_balls_bowled) FROM player_innings p'
+            ' JOIN matches m ON m.id = p.match_id'
+            f' WHERE p.player NOT GLOB ?{where} GROUP BY p.player', [PLACEHOLDER_GLOB] + args)
+        return [PlayerStats(name=name, runs=runs, sixes=sixes, runs_conceded=conceded,
+                            legal_balls_bowled=balls)
+                for name, runs, sixes, conceded, balls in rows]
+    
+    # --- Queries ---
+    
+    def match_count(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+    
+    def recent_matches(self, limit: int = 20) -> List[sqlite3.Row]:
+        return self.db.execute(
+            'SELECT * FROM matches ORDER BY played_at DESC LIMIT ?', (limit,)).fetchall()
+    
+    def _latest(self, where_a: str, args_a: tuple, where_b: str, args_b: tuple,
+                limit: int) -> List[sqlite3.Row]:
+        # Each arm walks its index newest first and stops at `limit`, so at
+        # most 2 * limit rows get merged, however many matches there are
+        arm = 'SELECT * FROM (SELECT * FROM matches WHERE {} ORDER BY played_at DESC LIMIT ?)'
+        sql = (arm.format(where_a) + ' UNION ALL ' + arm.format(where_b)
+               + ' ORDER BY played_at DESC LIMIT ?')
+        return self.db.execute(sql, args_a + (limit,) + args_b + (limit, limit)).fetchall()
+    
+    def matches_for_team(self, team: str, limit: int = 20) -> List[sqlite3.Row]:
+        return self._latest('team1 = ?', (team,), 'team2 = ? AND team1 != ?', (team, team),
+                            limit)
+    
+    def matches_between(self, team_a: str, team_b: str, limit: int = 20) -> List[sqlite3.Row]:
+        """Latest matches between two teams, whichever of them was team 1"""
+        return self._latest('team1 = ? AND team2 = ?', (team_a, team_b),
+                            'team1 = ? AND team2 = ?', (team_b, team_a), limit)
+    
+    def player_innings(self, player: str, limit: Optional[int] = None) -> List[sqlite3.Row]:
+        """Every innings the player batted in, newest first, with the match date"""
+        sql = ('SELECT m.played_at, m.team1, m.team2, p.* FROM player_innings p'
+               ' JOIN matches m ON m.id = p.match_id'
+               ' WHERE p.player = ? AND p.batted ORDER BY p.match_id DESC')
+        if limit is not None:
+            return self.db.execute(sql + ' LIMIT ?', (player, limit)).fetchall()
+        return self.db.execute(sql, (player,)).fetchall()
+    
+    def player_spells(self, player: str, limit: Optional[int] = None) -> List[sqlite3.Row]:
+        """Every innings the player bowled in, newest first"""
+        sql = ('SELECT m.played_at, m.team1, m.team2, p.* FROM player_innings p'
+               ' JOIN matches m ON m.id = p.match_id'
+               ' WHERE p.player = ? AND p.bowled ORDER BY p.match_id DESC')
+        if limit is not None:
+            return self.db.execute(sql + ' LIMIT ?', (player, limit)).fetchall()
+        return self.db.execute(sql, (player,)).fetchall()
+    
+    def match_deliveries(self, match_id: int, innings: int) -> List[sqlite3.Row]:
+        return self.db.execute(
+            'SELECT * FROM deliveries WHERE match_id = ? AND innings = ? ORDER BY seq',
+            (match_id, innings)).fetchall()
@@ -0,0 +1,397 @@
+"""Live scoreboard for spectators on the local network.
+
+ScoreBroadcaster runs a small asyncio HTTP server on its own thread.
+Viewers open / for a self-updating page, or /events directly: a
+Server-Sent Events stream whose first message is the whole scoreboard
+('snapshot') and whose later messages carry only the fields a change
+touched ('delta'), each tagged with the manager's state_version.
+
+The scorer pays for one small dict per change: the manager listener
+copies the scoreboard fields and hands them to the event loop. Working
+out the delta, encoding it and writing to every viewer all happen on the
+server thread. A viewer that stops reading is dropped once MAX_BUFFERED
+bytes are waiting for it, so it cannot hold up anyone else.
+
+/scorecard serves the full scorecard as JSON for clients that poll. Its
+ETag is the state_version, prefixed with a token drawn at every start
+because the versions count from 1 again after a restart. Each version is
+serialized at most once, and a request whose If-None-Match still matches
+gets a bare 304 straight from the version number. Polling connections
+are kept alive.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import threading
+from typing import NamedTuple, Optional
+
+from .versions import StateVersion
+
+# Unsent bytes allowed per viewer before it is disconnected
+MAX_BUFFERED = 64 * 1024
+
+# Seconds between comment lines that keep idle connections open
+KEEPALIVE = 15.0
+
+# Seconds a connection may sit between requests before it is closed
+IDLE_TIMEOUT = 30.0
+
+# Deliveries of the current innings listed in a scorecard
+RECENT_BALLS = 18
+
+# Serialized scorecards kept, newest versions only
+CARD_CACHE_SIZE = 4
+
+# Start of every ETag this process sends, so a tag cached before a
+# restart can never match a scorecard with the same version number
+ETAG_PREFIX = os.urandom(4).hex()
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>Score247 Live</title>
+<style>body{font-family:sans-serif;text-align:center;background:#111;color:#eee}
+#score{font-size:4em;margin:.3em}.sub{font-size:1.4em;color:#aaa}</style></head>
+<body><div class="sub" id="team"></div><div id="score">-</div>
+<div class="sub" id="overs"></div><div class="sub" id="players"></div>
+<script>
+var b = {};
+function show() {
+  document.getElementById('team').textContent = b.batting + ' - innings ' + b.innings;
+  document.getElementById('score').textContent = b.score + '/' + b.wickets;
+  var overs = Math.floor(b.balls / 6) + '.' + b.balls % 6 + ' overs';
+  document.getElementById('overs').textContent =
+    b.target ? overs + ' - target ' + b.target : overs;
+  document.getElementById('players').textContent =
+    b.striker + '* - ' + b.non_striker + ' | ' + b.bowler + ' bowling';
+}
+var events = new EventSource('/events');
+events.addEventListener('snapshot', function (e) { b = JSON.parse(e.data); show(); });
+events.addEventListener('delta', function (e) { Object.assign(b, JSON.parse(e.data)); show(); });
+</script></body></html>
+"""
+
+
+def scoreboard(mgr) -> dict:
+    """The fields viewers see, as they stand now"""
+    s = mgr.state
+    batting = mgr.get_batting_stats()
+    bowling = mgr.get_bowling_stats()
+    
+    def name(players, idx):
+        return players[idx].name if 0 <= idx < len(players) else ''
+    
+    return {
+        'v': mgr.state_version,
+        'innings': s.current_innings,
+        'batting': mgr.batting_team_name,
+        'score': s.score,
+        'wickets': s.wickets,
+        'balls': s.legal_balls,
+        'target': s.target,
+        'striker': name(batting, s.striker_idx),
+        'non_striker': name(batting, s.non_striker_idx),
+        'bowler': name(bowling, s.bowler_idx),
+    }
+
+
+class CardSource(NamedTuple):
+    """What a scorecard is built from, captured in O(1) on the scorer's thread"""
+    v: int
+    summary: str
+    batting_team: str
+    bowling_team: str
+    batting_is_team1: bool
+    version: StateVersion
+
+
+def card_source(mgr) -> CardSource:
+    return CardSource(
+        v=mgr.state_version,
+        summary=mgr.get_score_summary(),
+        batting_team=mgr.batting_team_name,
+        bowling_team=mgr.bowling_team_name,
+        batting_is_team1=mgr.batting_team_name == mgr.team1_name,
+        version=mgr.snapshot(),
+    )
+
+
+def scorecard(source: CardSource) -> dict:
+    """Scorecard of the innings in progress, from an immutable state version"""
+    version = source.version
+    batting, bowling = ((version.team1, version.team2) if source.batting_is_team1
+                        else (version.team2, version.team1))
+    return {
+        'v': source.v,
+        'innings': version.current_innings,
+        'summary': source.summary,
+        'batting_team': source.batting_team,
+        'bowling_team': source.bowling_team,
+        'score': version.score,
+        'wickets': version.wickets,
+        'overs': f"{version.legal_balls // 6}.{version.legal_balls % 6}",
+        'extras': version.extras,
+        'target': version.target,
+        'batting': [{
+            'name': p.name,
+            'runs': p.runs,
+            'balls': p.balls_faced,
+            'fours': p.fours,
+            'sixes': p.sixes,
+            'strike_rate': round(p.strike_rate(), 2),
+            'at_crease': idx in (version.striker_idx, version.non_striker_idx),
+        } for idx, p in enumerate(batting)],
+        'bowling': [{
+            'name': p.name,
+            'overs': f"{p.legal_balls_bowled // 6}.{p.legal_balls_bowled % 6}",
+            'runs': p.runs_conceded,
+            'wickets': p.wickets,
+            'economy': round(p.economy(), 2),
+        } for p in bowling if p.legal_balls_bowled or p.runs_conceded],
+        'fall_of_wickets': [{
+            'wicket': n,
+            'score': fow.score,
+            'overs': fow.overs_str(),
+            'batter': batting[fow.batter_idx].name,
+        } for n, fow in enumerate(version.falls, 1)],
+        'recent': version.ball_history(RECENT_BALLS),
+    }
+
+
+def lan_address() -> str:
+    """This device's address on the local network, as best it can tell"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # Connecting a UDP socket sends nothing; it only picks a route
+        sock.connect(('10.255.255.255', 1))
+        return sock.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+    finally:
+        sock.close()
+
+
+class ScoreBroadcaster:
+    """Streams a MatchManager's scoreboard to viewers over HTTP"""
+    
+    def __init__(self, mgr, host: str = '0.0.0.0', port: int = 8247):
+        self.mgr = mgr
+        self.host = host
+        self.port = port
+        
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = None
+        self._server = None
+        self._connections = set()
+        self._viewers = set()
+        self._board = {}
+        self._card = None
+        self._cards = {}
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+    
+    @property
+    def viewer_count(self) -> int:
+        return len(self._viewers)
+    
+    def url(self) -> str:
+        host = lan_address() if self.host == '0.0.0.0' else self.host
+        return f"http://{host}:{self.port}/"
+    
+    def start(self):
+        """Start serving; raises OSError if the port cannot be opened"""
+        if self.running:
+            return
+        
+        started = threading.Event()
+        failure = []
+        
+        def run():
+            loop = self._loop = asyncio.new_event_loop()
+            try:
+                self._server = loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                failure.append(e)
+                started.set()
+                loop.close()
+                return
+            # Port 0 asks the OS for a free one
+            self.port = self._server.sockets[0].getsockname()[1]
+            keepalive = loop.create_task(self._keepalive())
+            started.set()
+            
+            loop.run_forever()
+            
+            # Stopped: hang up on everyone and let their handlers finish
+            keepalive.cancel()
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            tasks = asyncio.all_tasks(loop)
+            if tasks:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=1))
+            self._viewers.clear()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+        
+        self._board = scoreboard(self.mgr)
+        self._card = card_source(self.mgr)
+        self._cards = {}
+        self._thread = threading.Thread(target=run, name='score247-broadcast', daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            self._thread.join()
+            self._thread = None
+            raise failure[0]
+        self.mgr.listeners.append(self.on_change)
+    
+    def stop(self):
+        if not self.running:
+            return
+        if self.on_change in self.mgr.listeners:
+            self.mgr.listeners.remove(self.on_change)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+    
+    def follow(self, mgr):
+        """Show another match from now on; viewers get the switch as one delta"""
+        if self.running:
+            self.mgr.listeners.remove(self.on_change)
+            mgr.listeners.append(self.on_change)
+            self.on_change(mgr)
+        self.mgr = mgr
+    
+    def on_change(self, mgr):
+        """Manager listener; runs on the scorer's thread, so it stays small"""
+        self._loop.call_soon_threadsafe(self._publish, scoreboard(mgr), card_source(mgr))
+    
+    def _publish(self, board: dict, card: CardSource):
+        self._card = card
+        delta = {key: value for key, value in board.items() if self._board.get(key) != value}
+        self._board = board
+        if len(delta) <= 1 or not self._viewers:
+            return
+        data = self._event('delta', delta)
+        for writer in list(self._viewers):
+            self._send(writer, data)
+    
+    def _event(self, kind: str, fields: dict) -> bytes:
+        data = json.dumps(fields, separators=(',', ':'))
+        return f"id: {fields['v']}\nevent: {kind}\ndata: {data}\n\n".encode()
+    
+    def _send(self, writer, data: bytes):
+        if writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+            self._viewers.discard(writer)
+            writer.close()
+        else:
+            writer.write(data)
+    
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE)
+            for writer in list(self._viewers):
+                self._send(writer, b': keepalive\n\n')
+    
+    async def _handle(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError):
+                    return
+                
+                lines = head.split(b'\r\n')
+                try:
+                    method, path = lines[0].split(b' ', 2)[:2]
+                except ValueError:
+                    return
+                path = path.split(b'?', 1)[0]
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(b':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                if method == b'GET' and path == b'/events':
+                    await self._stream(reader, writer)
+                    return
+                
+                keep_alive = headers.get(b'connection', b'').lower() != b'close'
+                self._route(writer, method, path, headers, keep_alive)
+                if not keep_alive:
+                    return
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+    
+    def _route(self, writer, method: bytes, path: bytes, headers: dict, keep_alive: bool):
+        if method != b'GET':
+            self._respond(writer, '405 Method Not Allowed', keep_alive,
+                          'text/plain', b'GET only\n')
+        elif path == b'/scorecard':
+            self._scorecard(writer, headers, keep_alive)
+        elif path == b'/':
+            self._respond(writer, '200 OK', keep_alive,
+                          'text/html; charset=utf-8', PAGE.encode())
+        else:
+            self._respond(writer, '404 Not Found', keep_alive, 'text/plain', b'Not found\n')
+    
+    def _scorecard(self, writer, headers: dict, keep_alive: bool):
+        card = self._card
+        etag = f'"{ETAG_PREFIX}-{card.v}"'
+        
+        # Unchanged since the client last asked: no serializing at all
+        tags = headers.get(b'if-none-match', b'').replace(b' ', b'').split(b',')
+        if etag.encode() in tags:
+            self._respond(writer, '304 Not Modified', keep_alive, etag=etag)
+            return
+        
+        body = self._cards.get(card.v)
+        if body is None:
+            body = json.dumps(scorecard(card), separators=(',', ':')).encode()
+            self._cards[card.v] = body
+            for v in sorted(self._cards)[:-CARD_CACHE_SIZE]:
+                del self._cards[v]
+        self._respond(writer, '200 OK', keep_alive, 'application/json', body, etag)
+    
+    def _respond(self, writer, status: str, keep_alive: bool, content_type: str = None,
+                 body: bytes = b'', etag: str = None):
+        head = [f"HTTP/1.1 {status}"]
+        if content_type:
+            head.append(f"Content-Type: {content_type}")
+        if etag:
+            head += [f"ETag: {etag}", "Cache-Control: no-cache"]
+        head += [
+            "Access-Control-Allow-Origin: *",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+    
+    async def _stream(self, reader, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\n\r\n"
+            + self._event('snapshot', self._board))
+        self._viewers.add(writer)
+        try:
+            # Viewers send nothing more; wait for them to hang up
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._viewers.discard(writer)
+            writer.close()
@@ -0,0 +1,87 @@
+"""Career figures per player, kept up to date as matches are archived"""
+
+from dataclasses import astuple, dataclass, fields
+from fnmatch import fnmatchcase
+from typing import Optional
+
+from .models import PlayerStats
+
+# Names the app gives players left unnamed ("Player 1", ...). Both sides
+# of every match have them, so they are no one in particular and get no
+# career. Also a SQLite GLOB pattern, with the same meaning there.
+PLACEHOLDER_GLOB = 'Player [0-9]*'
+
+
+def is_placeholder(name: str) -> bool:
+    return fnmatchcase(name, PLACEHOLDER_GLOB)
+
+
+@dataclass(slots=True)
+class CareerStats:
+    """One player's totals over every archived match"""
+    name: str
+    matches: int = 0
+
+    innings: int = 0
+    not_outs: int = 0
+    runs: int = 0
+    balls_faced: int = 0
+    fours: int = 0
+    sixes: int = 0
+    high_score: int = 0
+    high_score_not_out: bool = False
+
+    bowling_innings: int = 0
+    wickets: int = 0
+    runs_conceded: int = 0
+    legal_balls_bowled: int = 0
+    best_wickets: int = 0
+    best_runs: int = 0
+
+    # Same definitions as the in-match figures
+    strike_rate = PlayerStats.strike_rate
+    economy = PlayerStats.economy
+
+    def average(self) -> Optional[float]:
+        """Runs per dismissal; None until the player has been out"""
+        outs = self.innings - self.not_outs
+        return self.runs / outs if outs > 0 else None
+
+    def high_score_str(self) -> str:
+        return f"{self.high_score}{'*' if self.high_score_not_out else ''}"
+
+    def best_figures(self) -> str:
+        return f"{self.best_wickets}/{self.best_runs}" if self.bowling_innings else "-"
+
+    def add_innings(self, row):
+        """Fold in one archived player innings (a player_innings row)"""
+        if row['batted']:
+            not_out = not row['dismissed']
+            self.innings += 1
+            self.not_outs += not_out
+            self.runs += row['runs']
+            self.balls_faced += row['balls_faced']
+            self.fours += row['fours']
+            self.sixes += row['sixes']
+            if (row['runs'], not_out) > (self.high_score, self.high_score_not_out):
+                self.high_score = row['runs']
+                self.high_score_not_out = not_out
+
+        if row['bowled']:
+            first = self.bowling_innings == 0
+            self.bowling_innings += 1
+            self.wickets += row['wickets']
+            self.runs_conceded += row['runs_conceded']
+            self.legal_balls_bowled += row['legal_balls_bowled']
+            # More wickets is better, then fewer runs
+            if first or (row['wickets'], -row['runs_conceded']) > (self.best_wickets,
+                                                                   -self.best_runs):
+                self.best_wickets = row['wickets']
+                self.best_runs = row['runs_conceded']
+
+
+CAREER_FIELDS = tuple(f.name for f in fields(CareerStats))
+
+
+def career_row(career: CareerStats) -> tuple:
+    return astuple(career)
@@ -0,0 +1,156 @@
+"""Latency histograms for the scoring hot path.
+
+Functions wrapped with @timed(name) have each call's duration added to a
+fixed-size histogram under `name`. Recording is off by default and can
+be switched with enable()/disable() at any time; while it is off, a
+wrapped call costs one extra function call and a flag check.
+
+Bucket i of a histogram counts calls that took under 2**i microseconds
+(and at least 2**(i - 1)), so the memory used never grows and the
+percentiles are read off to within a factor of two.
+"""
+
+import functools
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 2**25 us is about 33 s; anything slower lands in the last bucket
+BUCKETS = 26
+
+_enabled = False
+_histograms: Dict[str, 'LatencyHistogram'] = {}
+
+
+class LatencyHistogram:
+    """Call durations in power-of-two microsecond buckets"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, us: float):
+        bucket = min(int(us).bit_length(), BUCKETS - 1)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total_us += us
+            if us > self.max_us:
+                self.max_us = us
+    
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * BUCKETS
+            self.count = 0
+            self.total_us = 0.0
+            self.max_us = 0.0
+    
+    def mean_ms(self) -> Optional[float]:
+        return self.total_us / self.count / 1000 if self.count else None
+    
+    def percentile_ms(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile call"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(2 ** bucket, self.max_us) / 1000
+        return self.max_us / 1000
+    
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.mean_ms(),
+            'p50_ms': self.percentile_ms(50),
+            'p95_ms': self.percentile_ms(95),
+            'p99_ms': self.percentile_ms(99),
+            'max_ms': self.max_us / 1000,
+            # [under this many microseconds, calls]
+            'buckets': [[2 ** i, n] for i, n in enumerate(self.counts) if n],
+        }
+
+
+def histogram(name: str) -> LatencyHistogram:
+    hist = _histograms.get(name)
+    if hist is None:
+        hist = _histograms.setdefault(name, LatencyHistogram(name))
+    return hist
+
+
+def timed(name: str):
+    """Decorator recording the wrapped function's call durations under `name`"""
+    def decorate(fn):
+        hist = histogram(name)
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.record((time.perf_counter() - start) * 1e6)
+        return wrapper
+    return decorate
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    for hist in _histograms.values():
+        hist.reset()
+
+
+def histograms() -> List[LatencyHistogram]:
+    return sorted(_histograms.values(), key=lambda hist: hist.name)
+
+
+def report_lines() -> List[str]:
+    """One line per histogram that has calls, for display"""
+    lines = []
+    for hist in histograms():
+        if hist.count:
+            lines.append(
+                f"{hist.name}: {hist.count} calls, "
+                f"p50 {hist.percentile_ms(50):.2f} / p95 {hist.percentile_ms(95):.2f} / "
+                f"p99 {hist.percentile_ms(99):.2f} / max {hist.max_us / 1000:.2f} ms"
+            )
+    return lines
+
+
+def export(path: str) -> bool:
+    """Write every histogram to `path` as JSON"""
+    data = {
+        'exported': datetime.now().isoformat(timespec='seconds'),
+        'enabled': _enabled,
+        'histograms': {hist.name: hist.summary() for hist in histograms()},
+    }
+    try:
+        with open(path, 'w') as fd:
+            json.dump(data, fd, indent=1)
+        return True
+    except OSError as e:
+        print(f"Save error: {e}")
+        return False
@@ -0,0 +1,1025 @@
+"""Match rules and persistence, independent of the Kivy UI"""
+
+import base64
+import itertools
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from . import instrument
+from .archive import MatchArchive
+from .models import (PLAYER_FIELDS, DeliveryDelta, FallOfWicket, InningsData, MatchState,
+                     OverStats, Partnership, PlayerStats, partnerships, players_from_rows)
+from .notation import (BALL_BYTES, MAX_BOWLER, MAX_EXTRA_RUNS, ball_codes, decode_ball,
+                       encode_ball, format_balls, parse_ball)
+from .resources import ResourceCache, ResourceRules, ResourceTable
+from .storage import CheckpointStore, JsonFileStore
+from .timeline import MatchTimeline
+from .versions import StateHistory, StateVersion, advance, freeze
+from .writer import PersistWorker
+
+# Shared by every manager, so no two states ever get the same version
+_state_versions = itertools.count(1)
+
+
+class MatchManager:
+    """Core match management"""
+    
+    def __init__(self, data_dir: str = '.'):
+        self.checkpoints = CheckpointStore(data_dir)
+        self.journal_path = None
+        self.journal_file = None
+        
+        # Single-file save written by earlier versions, read on resume only
+        self.legacy_path = os.path.join(data_dir, 'score247_data.json')
+        self.legacy_journal_path = os.path.join(data_dir, 'score247_journal.log')
+        
+        # Journal mode appends one compact record per event and only
+        # rewrites the full save every `checkpoint_every` events.
+        self.use_journal = True
+        self.checkpoint_every = 30
+        
+        # Optional background thread doing the actual file writes
+        self.writer = None
+        
+        # Finished matches, opened on first use
+        self.archive_path = os.path.join(data_dir, 'score247_archive.db')
+        self.archive = None
+        
+        # Par-score tables, computed once per overs/players/rules
+        self.resources = ResourceCache(os.path.join(data_dir, 'score247_resources.json'))
+        
+        # Called with the manager after every change to the match (see
+        # notify); state_version only ever goes up, and is unique across
+        # every manager in the process
+        self.listeners = []
+        self.state_version = 0
+        self.reset_config()
+    
+    def reset_config(self):
+        self.team1_name = "Team A"
+        self.team2_name = "Team B"
+        self.overs = 5
+        self.players_per_team = 6
+        
+        self.team1_players = []
+        self.team2_players = []
+        
+        self.wide_gives_runs = True
+        self.wide_counts_as_ball = False
+        self.noball_gives_runs = True
+        self.noball_rebowled = True
+        self.last_man_can_play = False
+        
+        self.batting_team_name = ""
+        self.bowling_team_name = ""
+        self.toss_winner = ""
+        
+        self.is_resumed = False
+        
+        self.match_uid = None
+        self.started_at = None
+        
+        self.state = MatchState()
+        self.versions = StateHistory(freeze(self.state))
+        self.timeline = MatchTimeline(self)
+        self.undo_stack = []
+        self.redo_stack = []
+        
+        self.event_seq = 0
+        self.checkpoint_seq = None
+        self.journal_undoable = 0
+        self.replaying = False
+    
+    def init_players(self):
+        self.match_uid = uuid.uuid4().hex
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.state.team1_stats = [PlayerStats(name=name) for name in self.team1_players]
+        self.state.team2_stats = [PlayerStats(name=name) for name in self.team2_players]
+        self.versions = StateHistory(freeze(self.state))
+        self.timeline.reset()
+        self.notify()
+    
+    def fork(self) -> 'MatchManager':
+        """Scratch manager with this match's setup and rules; never writes to disk"""
+        other = MatchManager(self.checkpoints.data_dir)
+        for name in ('team1_name', 'team2_name', 'team1_players', 'team2_players',
+                     'overs', 'players_per_team', 'wide_gives_runs', 'wide_counts_as_ball',
+                     'noball_gives_runs', 'noball_rebowled', 'last_man_can_play',
+                     'batting_team_name', 'bowling_team_name', 'toss_winner'):
+            setattr(other, name, getattr(self, name))
+        other.replaying = True
+        return other
+    
+    def get_batting_stats(self) -> List[PlayerStats]:
+        return (self.state.team1_stats if self.batting_team_name == self.team1_name 
+                else self.state.team2_stats)
+    
+    def get_bowling_stats(self) -> List[PlayerStats]:
+        return (self.state.team2_stats if self.batting_team_name == self.team1_name 
+                else self.state.team1_stats)
+    
+    def get_rules_summary(self) -> str:
+        lines = [
+            f"Overs: {self.overs}",
+            f"Players per team: {self.players_per_team}",
+            "",
+            "Wide ball rules:",
+            f"  • Gives run: {'Yes' if self.wide_gives_runs else 'No'}",
+            f"  • Counts as ball: {'Yes' if self.wide_counts_as_ball else 'No'}",
+            "",
+            "No-ball rules:",
+            f"  • Gives run: {'Yes' if self.noball_gives_runs else 'No'}",
+            f"  • Re-bowled: {'Yes' if self.noball_rebowled else 'No'}",
+            f"  • Wickets allowed: All (gully rules)",
+            "",
+            f"Last man can play: {'Yes' if self.last_man_can_play else 'No'}",
+        ]
+        return "\n".join(lines)
+    
+    @instrument.timed('save_snapshot')
+    def save_snapshot(self, delta):
+        """Push an undo entry: one DeliveryDelta, or a list of them for a batch"""
+        self.undo_stack.append(delta)
+    
+    def undo(self) -> bool:
+        if self.undo_stack:
+            entry = self.undo_stack.pop()
+            if isinstance(entry, list):
+                for delta in reversed(entry):
+                    self.revert_delivery(delta)
+            else:
+                self.revert_delivery(entry)
+            self.redo_stack.append(entry)
+            self.record_event('u')
+            return True
+        return False
+    
+    def redo(self) -> bool:
+        if self.redo_stack:
+            entry = self.redo_stack.pop()
+            if isinstance(entry, list):
+                balls = [(d.args, d.bowler_idx) for d in entry]
+                self.save_snapshot(self.apply_batch(balls))
+                self.record_event('D', 1, *[[*args, bowler] for args, bowler in balls])
+                return True
+            if self.state.bowler_idx != entry.bowler_idx:
+                self.change_bowler(entry.bowler_idx)
+            self.save_snapshot(self.apply_delivery(*entry.args))
+            self.record_event('d', *entry.args)
+            return True
+        return False
+    
+    def is_solo_batting(self) -> bool:
+        if not self.last_man_can_play:
+            return False
+        return self.state.wickets == self.players_per_team - 1
+    
+    def get_max_wickets_for_innings_end(self) -> int:
+        if self.last_man_can_play:
+            return self.players_per_team
+        else:
+            return self.players_per_team - 1
+    
+    def is_innings_over(self) -> bool:
+        s = self.state
+        if s.wickets >= self.get_max_wickets_for_innings_end():
+            return True
+        if s.legal_balls >= self.overs * 6:
+            return True
+        return bool(s.target and s.score >= s.target)
+    
+    @instrument.timed('process_delivery')
+    def process_delivery(self, runs_scored: int, is_wide=False, is_noball=False, 
+                        is_wicket=False, runs_from_extra=0):
+        delta = self.apply_delivery(runs_scored, is_wide, is_noball, is_wicket,
+                                    runs_from_extra)
+        self.save_snapshot(delta)
+        self.redo_stack = []
+        self.record_event('d', *delta.args)
+    
+    def process_deliveries(self, deliveries: Iterable, group_undo: bool = True) -> int:
+        """Apply many deliveries with a single save.
+        
+        Each delivery is either a tuple of process_delivery arguments or a
+        dict of its keyword arguments, optionally with a 'bowler_idx' to
+        change bowler before that ball. Everything is validated before the
+        first ball is applied, and if the innings ends (or anything else
+        fails) part way through, the whole batch is rolled back. With group_undo the batch is a single
+        undo entry, otherwise each ball gets its own.
+        
+        Returns the number of deliveries applied.
+        """
+        balls = [self.normalize_delivery(i, d) for i, d in enumerate(deliveries)]
+        if not balls:
+            return 0
+        
+        deltas = self.apply_batch(balls)
+        if group_undo:
+            self.save_snapshot(deltas)
+        else:
+            for delta in deltas:
+                self.save_snapshot(delta)
+        self.redo_stack = []
+        
+        self.record_event('D', int(group_undo),
+                          *[[*delta.args, delta.bowler_idx] for delta in deltas])
+        return len(deltas)
+    
+    def normalize_delivery(self, position: int, delivery):
+        if isinstance(delivery, dict):
+            delivery = dict(delivery)
+            bowler_idx = delivery.pop('bowler_idx', None)
+            try:
+                runs_scored = delivery.pop('runs_scored')
+            except KeyError:
+                raise ValueError(f"Delivery {position + 1}: runs_scored missing")
+            args = [runs_scored, delivery.pop('is_wide', False),
+                    delivery.pop('is_noball', False), delivery.pop('is_wicket', False),
+                    delivery.pop('runs_from_extra', 0)]
+            if delivery:
+                raise ValueError(f"Delivery {position + 1}: unknown fields {sorted(delivery)}")
+        else:
+            args = list(delivery)
+            bowler_idx = args.pop() if len(args) == 6 else None
+            if not 1 <= len(args) <= 5:
+                raise ValueError(f"Delivery {position + 1}: expected 1-5 values")
+            args += [False, False, False, 0][len(args) - 1:]
+        
+        runs_scored, is_wide, is_noball, is_wicket, runs_from_extra = args
+        if not isinstance(runs_scored, int) or not 0 <= runs_scored <= 6:
+            raise ValueError(f"Delivery {position + 1}: runs must be 0-6")
+        if not isinstance(runs_from_extra, int) or not 0 <= runs_from_extra <= MAX_EXTRA_RUNS:
+            raise ValueError(f"Delivery {position + 1}: extra runs must be 0-{MAX_EXTRA_RUNS}")
+        if is_wide and is_noball:
+            raise ValueError(f"Delivery {position + 1}: cannot be both wide and no-ball")
+        if bowler_idx is not None and not 0 <= bowler_idx < min(len(self.get_bowling_stats()),
+                                                                MAX_BOWLER + 1):
+            raise ValueError(f"Delivery {position + 1}: no bowler {bowler_idx}")
+        
+        args = (runs_scored, int(is_wide), int(is_noball), int(is_wicket), runs_from_extra)
+        return args, bowler_idx
+    
+    def apply_batch(self, balls) -> List[DeliveryDelta]:
+        """Apply validated (args, bowler_idx) pairs, all or nothing.
+        
+        Any error part way through, not only the innings ending, takes the
+        balls already applied back out before it is raised.
+        """
+        deltas = []
+        bowler_before = self.state.bowler_idx
+        try:
+            for position, (args, bowler_idx) in enumerate(balls):
+                if self.is_innings_over():
+                    raise ValueError(f"Delivery {position + 1}: innings is already over")
+                if bowler_idx is not None:
+                    self.set_bowler(bowler_idx)
+                deltas.append(self.apply_delivery(*args))
+        except Exception:
+            for delta in reversed(deltas):
+                self.revert_delivery(delta)
+            self.set_bowler(bowler_before)
+            raise
+        return deltas
+    
+    def apply_delivery(self, runs_scored: int, is_wide, is_noball, is_wicket,
+                       runs_from_extra) -> DeliveryDelta:
+        # Encoding first also rejects out-of-range input before any change
+        ball = encode_ball(runs_scored, is_wide, is_noball, is_wicket, runs_from_extra,
+                           self.state.bowler_idx)
+        delta = DeliveryDelta(
+            args=(runs_scored, int(is_wide), int(is_noball), int(is_wicket), runs_from_extra),
+            striker_idx=self.state.striker_idx,
+            non_striker_idx=self.state.non_striker_idx,
+            bowler_idx=self.state.bowler_idx,
+        )
+        
+        if is_wicket:
+            if self.is_solo_batting():
+                self.tally_over(self.state.overs, self.state.legal_balls, self.state.bowler_idx,
+                                0, 1, 0, False)
+                # The last man is whoever was left in at the wicket before
+                falls = self.state.falls
+                batter_idx = falls[-1].partner_idx if falls else self.state.striker_idx
+                self.state.wickets += 1
+                delta.wickets = 1
+                falls.append(FallOfWicket(self.state.score, self.state.legal_balls, batter_idx, -1,
+                                          self.state.bowler_idx))
+                self.state.balls += ball
+                self.push_version(delta)
+                return delta
+        
+        extra_runs = self.extra_runs(is_wide, is_noball, runs_from_extra)
+        total_runs = runs_scored + extra_runs
+        
+        self.state.score += total_runs
+        self.state.extras += extra_runs
+        delta.score = total_runs
+        delta.extras = extra_runs
+        
+        is_legal = self.is_legal_delivery(is_wide, is_noball)
+        
+        self.tally_over(self.state.overs, self.state.legal_balls, self.state.bowler_idx,
+                        total_runs, int(bool(is_wicket)), extra_runs, is_legal)
+        
+        if is_legal:
+            self.state.legal_balls += 1
+            delta.legal_balls = 1
+        
+        bat_stats = self.get_batting_stats()
+        striker = bat_stats[self.state.striker_idx]
+        
+        if not is_wide:
+            if is_legal or is_noball:
+                striker.balls_faced += 1
+                delta.bat_balls = 1
+            striker.runs += runs_scored
+            delta.bat_runs = runs_scored
+            if runs_scored == 4:
+                striker.fours += 1
+                delta.bat_fours = 1
+            elif runs_scored == 6:
+                striker.sixes += 1
+                delta.bat_sixes = 1
+        
+        bowl_stats = self.get_bowling_stats()
+        bowler = bowl_stats[self.state.bowler_idx]
+        
+        bowler.runs_conceded += total_runs
+        delta.bowl_runs = total_runs
+        if is_legal:
+            bowler.legal_balls_bowled += 1
+            delta.bowl_balls = 1
+        if is_wicket:
+            bowler.wickets += 1
+            delta.bowl_wickets = 1
+        
+        if is_wicket:
+            self.state.wickets += 1
+            delta.wickets = 1
+            self.state.falls.append(FallOfWicket(
+                self.state.score, self.state.legal_balls, self.state.striker_idx,
+                self.state.non_striker_idx, self.state.bowler_idx))
+            next_idx = max(self.state.striker_idx, self.state.non_striker_idx) + 1
+            if next_idx < len(bat_stats):
+                self.state.striker_idx = next_idx
+        
+        solo = self.is_solo_batting()
+        
+        if not is_wicket and not solo and runs_scored % 2 != 0:
+            self.state.striker_idx, self.state.non_striker_idx = \
+                self.state.non_striker_idx, self.state.striker_idx
+        
+        if is_legal and self.state.legal_balls % 6 == 0 and not solo:
+            self.state.striker_idx, self.state.non_striker_idx = \
+                self.state.non_striker_idx, self.state.striker_idx
+        
+        self.state.balls += ball
+        self.push_version(delta)
+        return delta
+    
+    def extra_runs(self, is_wide, is_noball, runs_from_extra) -> int:
+        """Runs a delivery adds beyond those off the bat"""
+        extra_runs = runs_from_extra
+        if is_wide and self.wide_gives_runs:
+            extra_runs += 1
+        if is_noball and self.noball_gives_runs:
+            extra_runs += 1
+        return extra_runs
+    
+    def is_legal_delivery(self, is_wide, is_noball) -> bool:
+        """Whether a delivery counts as one of the over's six balls"""
+        if is_wide and not self.wide_counts_as_ball:
+            return False
+        if is_noball and self.noball_rebowled:
+            return False
+        return True
+    
+    @staticmethod
+    def tally_over(overs: List[OverStats], legal_before: int, bowler_idx: int,
+                   runs: int, wickets: int, extras: int, is_legal: bool):
+        """Add one delivery, bowled after `legal_before` legal balls, to its over"""
+        number = legal_before // 6
+        if not overs or overs[-1].number != number:
+            overs.append(OverStats(number, bowler_idx))
+        over = overs[-1]
+        over.runs += runs
+        over.wickets += wickets
+        over.extras += extras
+        over.legal_balls += is_legal
+        over.deliveries += 1
+    
+    def overs_from_balls(self, balls: bytes) -> List[OverStats]:
+        """Per-over totals of a packed innings, e.g. after loading a save"""
+        overs = []
+        legal_balls = wickets = 0
+        for code in ball_codes(balls):
+            runs_scored, is_wide, is_noball, is_wicket, runs_from_extra, bowler = decode_ball(code)
+            if is_wicket and self.last_man_can_play and wickets == self.players_per_team - 1:
+                # Last man out: only the wicket counts (see apply_delivery)
+                self.tally_over(overs, legal_balls, bowler, 0, 1, 0, False)
+                wickets += 1
+                continue
+            extra_runs = self.extra_runs(is_wide, is_noball, runs_from_extra)
+            is_legal = self.is_legal_delivery(is_wide, is_noball)
+            self.tally_over(overs, legal_balls, bowler, runs_scored + extra_runs,
+                            int(is_wicket), extra_runs, is_legal)
+            legal_balls += is_legal
+            wickets += is_wicket
+        return overs
+    
+    def falls_from_balls(self, balls: bytes, innings: int) -> List[FallOfWicket]:
+        """Falls of wickets of a packed innings, for saves made before they were kept.
+        
+        Who was out depends on the strike, so the innings is replayed on a
+        scratch manager rather than read off the balls like overs_from_balls.
+        """
+        fork = self.fork()
+        if innings != self.state.current_innings:
+            fork.batting_team_name, fork.bowling_team_name = \
+                fork.bowling_team_name, fork.batting_team_name
+        fork.state = MatchState(
+            team1_stats=[PlayerStats(name=p.name) for p in self.state.team1_stats],
+            team2_stats=[PlayerStats(name=p.name) for p in self.state.team2_stats],
+        )
+        fork.versions = StateHistory(freeze(fork.state))
+        for code in ball_codes(balls):
+            runs_scored, is_wide, is_noball, is_wicket, runs_from_extra, bowler = decode_ball(code)
+            fork.set_bowler(bowler)
+            fork.apply_delivery(runs_scored, is_wide, is_noball, is_wicket, runs_from_extra)
+        return fork.state.falls
+    
+    def get_falls(self, innings: int, version: StateVersion = None) -> List[FallOfWicket]:
+        """Falls of wickets of `innings` as of `version` (default now)"""
+        v = version or self.snapshot()
+        if innings == 1 and v.current_innings == 2:
+            return list(v.innings1_falls)
+        if innings == v.current_innings:
+            return list(v.falls)
+        return []
+    
+    def get_partnerships(self, innings: int, version: StateVersion = None) -> List[Partnership]:
+        """Stands of `innings` as of `version` (default now), from its falls of wickets"""
+        v = version or self.snapshot()
+        if innings > v.current_innings:
+            return []
+        total = v.innings1_data if innings < v.current_innings else v
+        return partnerships(self.get_falls(innings, v), total.score, total.legal_balls,
+                            self.players_per_team, self.get_max_wickets_for_innings_end())
+    
+    def recent_balls(self, count: int) -> List[str]:
+        """History-strip text for the last `count` deliveries"""
+        return format_balls(self.state.balls, count)
+    
+    def set_bowler(self, bowler_idx: int):
+        self.state.bowler_idx = bowler_idx
+        self.versions.replace_head(self.versions.head._replace(bowler_idx=bowler_idx))
+    
+    def push_version(self, delta: DeliveryDelta):
+        self.versions.push(advance(
+            self.versions.head, self.state, delta.striker_idx, delta.bowler_idx,
+            self.batting_team_name == self.team1_name))
+    
+    def snapshot(self) -> StateVersion:
+        """Immutable view of the current state, O(1)"""
+        return self.versions.head
+    
+    def version_at(self, ball: int) -> StateVersion:
+        """State after `ball` deliveries of this innings (0 = innings start or resume point)"""
+        return self.versions.at(ball)
+    
+    def revert_delivery(self, delta: DeliveryDelta):
+        s = self.state
+        
+        s.score -= delta.score
+        s.wickets -= delta.wickets
+        s.legal_balls -= delta.legal_balls
+        s.extras -= delta.extras
+        
+        s.striker_idx = delta.striker_idx
+        s.non_striker_idx = delta.non_striker_idx
+        s.bowler_idx = delta.bowler_idx
+        
+        striker = self.get_batting_stats()[delta.striker_idx]
+        striker.runs -= delta.bat_runs
+        striker.balls_faced -= delta.bat_balls
+        striker.fours -= delta.bat_fours
+        striker.sixes -= delta.bat_sixes
+        
+        bowler = self.get_bowling_stats()[delta.bowler_idx]
+        bowler.runs_conceded -= delta.bowl_runs
+        bowler.legal_balls_bowled -= delta.bowl_balls
+        bowler.wickets -= delta.bowl_wickets
+        
+        # Deliveries are undone newest first, so this one is in the last over
+        over = s.overs[-1]
+        over.runs -= delta.score
+        over.wickets -= delta.wickets
+        over.extras -= delta.extras
+        over.legal_balls -= delta.legal_balls
+        over.deliveries -= 1
+        if over.deliveries == 0:
+            s.overs.pop()
+        if delta.wickets:
+            s.falls.pop()
+        
+        del s.balls[-BALL_BYTES:]
+        
+        self.versions.pop()
+    
+    def change_bowler(self, new_bowler_idx: int):
+        self.set_bowler(new_bowler_idx)
+        self.record_event('b', new_bowler_idx)
+    
+    def end_innings(self):
+        s = self.state
+        
+        if s.current_innings == 1:
+            s.innings1_data = InningsData(
+                score=s.score,
+                wickets=s.wickets,
+                legal_balls=s.legal_balls,
+                extras=s.extras
+            )
+            
+            self.undo_stack = []
+            self.redo_stack = []
+            
+            s.target = s.score + 1
+            s.current_innings = 2
+            s.innings1_balls = bytes(s.balls)
+            s.innings1_overs = s.overs
+            s.overs = []
+            s.innings1_falls = s.falls
+            s.falls = []
+            
+            s.score = 0
+            s.wickets = 0
+            s.legal_balls = 0
+            s.extras = 0
+            s.balls = bytearray()
+            s.striker_idx = 0
+            s.non_striker_idx = 1
+            s.bowler_idx = 0
+            
+            self.batting_team_name, self.bowling_team_name = \
+                self.bowling_team_name, self.batting_team_name
+        else:
+            s.innings2_data = InningsData(
+                score=s.score,
+                wickets=s.wickets,
+                legal_balls=s.legal_balls,
+                extras=s.extras
+            )
+        
+        self.versions = StateHistory(freeze(s))
+        self.record_event('i')
+    
+    # --- Par scores ---
+    
+    def resource_table(self) -> ResourceTable:
+        return self.resources.get(ResourceRules(
+            balls=self.overs * 6,
+            wickets=self.get_max_wickets_for_innings_end(),
+            wide_runs=int(self.wide_gives_runs),
+            wide_legal=self.wide_counts_as_ball,
+            noball_runs=int(self.noball_gives_runs),
+            noball_legal=not self.noball_rebowled,
+        ))
+    
+    def revised_target(self) -> Optional[int]:
+        """Second-innings target if the first innings stopped now"""
+        s = self.state
+        if s.current_innings != 1:
+            return None
+        table = self.resource_table()
+        return table.revised_target(s.score, table.used(s.legal_balls, s.wickets))
+    
+    def par_score(self) -> Optional[int]:
+        """Score the chasing side should have by now, given what it has used"""
+        s = self.state
+        first = s.innings1_data
+        if s.current_innings != 2 or first is None:
+            return None
+        table = self.resource_table()
+        return int(table.par(first.score, table.used(first.legal_balls, first.wickets),
+                             table.used(s.legal_balls, s.wickets)))
+    
+    # --- Persistence ---
+    
+    def start_writer(self, delay: float = 0.3, max_unsaved_balls: int = 6):
+        """Move disk writes to a background thread (see PersistWorker)"""
+        if self.writer is None:
+            self.writer = PersistWorker(self, delay, max_unsaved_balls)
+    
+    def stop_writer(self):
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+    
+    def flush(self):
+        """Block until every queued write has reached the disk"""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def notify(self):
+        """Bump state_version and tell every listener the match has changed"""
+        self.state_version = next(_state_versions)
+        for listener in self.listeners:
+            listener(self)
+    
+    def record_event(self, kind: str, *args):
+        """Journal one match event, or write a full checkpoint when one is due"""
+        self.event_seq += 1
+        
+        if not self.replaying:
+            self.notify()
+            
+            if kind == 'd':
+                balls = 1
+            elif kind == 'D':
+                balls = len(args) - 1
+            else:
+                balls = 0
+            
+            checkpoint_due = (
+                not self.use_journal
+                or self.checkpoint_seq is None
+                or self.event_seq - self.checkpoint_seq >= self.checkpoint_every
+                # An undo reaching past the last checkpoint cannot be replayed
+                or (kind == 'u' and self.journal_undoable == 0)
+            )
+            if checkpoint_due:
+                self.persist_to_disk(balls)
+                return
+            
+            record = [self.event_seq, kind, *args]
+            text = json.dumps(record, separators=(',', ':')) + '\n'
+            if self.writer is not None:
+                self.writer.submit('j', text, balls)
+            else:
+                self.write_journal(text)
+        
+        if kind == 'd':
+            self.journal_undoable += 1
+        elif kind == 'D':
+            self.journal_undoable += 1 if args[0] else len(args) - 1
+        elif kind == 'u':
+            self.journal_undoable -= 1
+        elif kind == 'i':
+            self.journal_undoable = 0
+    
+    def apply_event(self, kind: str, args: list):
+        if kind == 'd':
+            self.process_delivery(*args)
+        elif kind == 'D':
+            self.process_deliveries(args[1:], group_undo=bool(args[0]))
+        elif kind == 'u':
+            self.undo()
+        elif kind == 'b':
+            self.change_bowler(args[0])
+        elif kind == 'i':
+            self.end_innings()
+    
+    def replay_journal(self) -> bool:
+        """Re-apply journal records written after the loaded checkpoint.
+        
+        Returns False if it stopped at a gap in the event sequence.
+        """
+        if not os.path.exists(self.journal_path):
+            return True
+        
+        self.replaying = True
+        try:
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final record from a crash mid-append
+                        break
+                    seq, kind, args = record[0], record[1], record[2:]
+                    if seq <= self.event_seq:
+                        continue
+                    if seq != self.event_seq + 1:
+                        # Events are missing; what follows would land on
+                        # the wrong state, so resume from before the gap
+                        print(f"Load error: journal skips from event {self.event_seq} to {seq}")
+                        return False
+                    self.apply_event(kind, args)
+        finally:
+            self.replaying = False
+        return True
+    
+    def write_journal(self, text: str):
+        if self.journal_file is None:
+            self.journal_file = open(self.journal_path, 'a')
+        self.journal_file.write(text)
+        self.journal_file.flush()
+    
+    def close_journal(self):
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+    
+    @instrument.timed('persist_to_disk')
+    def persist_to_disk(self, balls: int = 0):
+        """Write a full checkpoint; `balls` counts deliveries only it carries"""
+        setup = {
+            't1_name': self.team1_name,
+            't2_name': self.team2_name,
+            't1_players': list(self.team1_players),
+            't2_players': list(self.team2_players),
+            'overs': self.overs,
+            'players': self.players_per_team,
+            'batting': self.batting_team_name,
+            'bowling': self.bowling_team_name,
+            'toss_winner': self.toss_winner,
+            'wd_runs': self.wide_gives_runs,
+            'wd_ball': self.wide_counts_as_ball,
+            'nb_runs': self.noball_gives_runs,
+            'nb_rebowl': self.noball_rebowled,
+            'last_man': self.last_man_can_play,
+            'uid': self.match_uid,
+            'started': self.started_at,
+        }
+        
+        # The state version is immutable, so the (possibly background)
+        # writer can serialize it while scoring carries on.
+        snapshot = (setup, self.versions.head, self.event_seq)
+        
+        # Undo now reaches back only as far as this checkpoint. The
+        # checkpoint_seq moves once it is on disk (see write_checkpoint);
+        # until then every event is a checkpoint of its own, so nothing
+        # is journaled on top of a checkpoint that might never land.
+        self.journal_undoable = 0
+        
+        if self.writer is not None:
+            self.writer.submit('c', snapshot, balls)
+        else:
+            try:
+                self.write_checkpoint(snapshot)
+            except OSError as e:
+                # The next event tries again
+                print(f"Save error: {e}")
+    
+    @instrument.timed('write_checkpoint')
+    def write_checkpoint(self, snapshot):
+        setup, version, seq = snapshot
+        data = {
+            'setup': setup,
+            'state': version.to_save(),
+            'seq': seq,
+        }
+        gen = self.checkpoints.save(data)
+        
+        # Events after this checkpoint go to its own journal
+        self.close_journal()
+        self.journal_path = self.checkpoints.journal_path(gen)
+        self.checkpoint_seq = seq
+    
+    @instrument.timed('load_from_disk')
+    def load_from_disk(self) -> bool:
+        """Resume from the newest valid checkpoint plus its journal"""
+        self.flush()
+        
+        # Newest first, passing over any whose journal has lost events (e.g.
+        # after a failed checkpoint write) as well as any that fail the CRC
+        fallback = False
+        for gen, data in self.checkpoints.scan():
+            if self.restore_checkpoint(data, self.checkpoints.journal_path(gen), allow_gap=False):
+                if fallback:
+                    self.persist_to_disk()
+                return True
+            fallback = True
+        
+        # No journal is whole: resume the newest as far as its journal goes.
+        # A fresh checkpoint keeps new events from following the gap.
+        for gen, data in self.checkpoints.scan():
+            if self.restore_checkpoint(data, self.checkpoints.journal_path(gen)):
+                self.persist_to_disk()
+                return True
+        
+        if os.path.exists(self.legacy_path):
+            legacy = JsonFileStore(self.legacy_path)
+            if legacy.exists('match'):
+                return self.restore_checkpoint(legacy.get('match'), self.legacy_journal_path)
+        return False
+    
+    def restore_checkpoint(self, data: dict, journal_path: str, allow_gap: bool = True) -> bool:
+        """Load a checkpoint and replay its journal; False if either fails.
+        
+        With allow_gap=False a journal that skips events counts as a failure.
+        """
+        try:
+            s = data['setup']
+            self.team1_name = s['t1_name']
+            self.team2_name = s['t2_name']
+            self.team1_players = s['t1_players']
+            self.team2_players = s['t2_players']
+            self.overs = s['overs']
+            self.players_per_team = s['players']
+            self.batting_team_name = s['batting']
+            self.bowling_team_name = s['bowling']
+            self.toss_winner = s.get('toss_winner', '')
+            
+            self.wide_gives_runs = s.get('wd_runs', True)
+            self.wide_counts_as_ball = s.get('wd_ball', False)
+            self.noball_gives_runs = s.get('nb_runs', True)
+            self.noball_rebowled = s.get('nb_rebowl', True)
+            self.last_man_can_play = s.get('last_man', False)
+            
+            # Saves from before the archive have no identity yet
+            self.match_uid = s.get('uid') or uuid.uuid4().hex
+            self.started_at = s.get('started') or datetime.now().isoformat(timespec='seconds')
+            
+            st = data['state']
+            
+            innings1_data = None
+            innings2_data = None
+            
+            if st.get('innings1_data'):
+                innings1_data = InningsData(**st['innings1_data'])
+            if st.get('innings2_data'):
+                innings2_data = InningsData(**st['innings2_data'])
+            
+            self.state = MatchState(
+                score=st['score'],
+                wickets=st['wickets'],
+                legal_balls=st['legal_balls'],
+                extras=st.get('extras', 0),
+                striker_idx=st['striker_idx'],
+                non_striker_idx=st['non_striker_idx'],
+                bowler_idx=st['bowler_idx'],
+                current_innings=st['current_innings'],
+                target=st.get('target'),
+                innings1_data=innings1_data,
+                innings2_data=innings2_data,
+            )
+            
+            if 'balls' in st:
+                self.state.balls = bytearray(base64.b64decode(st['balls']))
+                self.state.innings1_balls = base64.b64decode(st.get('innings1_balls', ''))
+            else:
+                # Older saves kept display strings; the bowler of each is unknown
+                for token in st.get('ball_history', []):
+                    self.state.balls += encode_ball(*parse_ball(token), 0)
+            self.state.overs = self.overs_from_balls(self.state.balls)
+            self.state.innings1_overs = self.overs_from_balls(self.state.innings1_balls)
+            
+            if 'team1_rows' in st:
+                fields = st.get('player_fields', PLAYER_FIELDS)
+                self.state.team1_stats = players_from_rows(st['team1_rows'], fields)
+                self.state.team2_stats = players_from_rows(st['team2_rows'], fields)
+            else:
+                self.state.team1_stats = [PlayerStats(**p) for p in st['team1_stats']]
+                self.state.team2_stats = [PlayerStats(**p) for p in st['team2_stats']]
+            
+            if 'falls' in st:
+                self.state.falls = [FallOfWicket(*row) for row in st['falls']]
+                self.state.innings1_falls = [FallOfWicket(*row) for row in st['innings1_falls']]
+            else:
+                self.state.falls = self.falls_from_balls(self.state.balls, st['current_innings'])
+                self.state.innings1_falls = self.falls_from_balls(self.state.innings1_balls, 1)
+            self.versions = StateHistory(freeze(self.state))
+            self.timeline.reset()
+            self.undo_stack = []
+            self.redo_stack = []
+            
+            self.event_seq = self.checkpoint_seq = data.get('seq', 0)
+            self.journal_undoable = 0
+            self.close_journal()
+            self.journal_path = journal_path
+            if not self.replay_journal() and not allow_gap:
+                return False
+            
+            self.is_resumed = True
+            self.notify()
+            
+            return True
+        except Exception as e:
+            print(f"Load error: {e}")
+            return False
+    
+    # --- Results ---
+    
+    def get_result(self):
+        """Result headline and outcome ('win', 'tie' or 'none')"""
+        s = self.state
+        
+        if s.target:
+            if s.score >= s.target:
+                return f"{self.batting_team_name} Wins!", 'win'
+            elif s.score == s.target - 1:
+                return "Match Tied!", 'tie'
+            else:
+                return f"{self.bowling_team_name} Wins!", 'win'
+        return "Match Drawn", 'none'
+    
+    def get_score_summary(self) -> str:
+        s = self.state
+        
+        if self.batting_team_name == self.team1_name:
+            inn1_team = self.team2_name
+            inn2_team = self.team1_name
+        else:
+            inn1_team = self.team1_name
+            inn2_team = self.team2_name
+        
+        if s.innings1_data:
+            inn1_text = f"{inn1_team}: {s.innings1_data.score}/{s.innings1_data.wickets} ({s.innings1_data.overs_str()})"
+        else:
+            inn1_text = f"{inn1_team}: Data not available"
+        
+        if s.innings2_data:
+            inn2_text = f"{inn2_team}: {s.innings2_data.score}/{s.innings2_data.wickets} ({s.innings2_data.overs_str()})"
+        else:
+            inn2_text = f"{inn2_team}: {s.score}/{s.wickets} ({s.legal_balls//6}.{s.legal_balls%6})"
+        
+        return f"{inn1_text}\n{inn2_text}"
+    
+    def get_player_of_match(self):
+        all_players = self.state.team1_stats + self.state.team2_stats
+        
+        best_player = None
+        best_score = -1
+        best_reason = ""
+        
+        for p in all_players:
+            if p.balls_faced == 0 and p.legal_balls_bowled == 0:
+                continue
+            
+            score = 0
+            reasons = []
+            
+            if p.runs > 0:
+                score += p.runs
+                reasons.append(f"{p.runs} runs")
+                
+                if p.balls_faced >= 10 and p.strike_rate() > 150:
+                    bonus = p.runs * 0.5
+                    score += bonus
+                    reasons.append(f"SR {p.strike_rate():.1f}")
+            
+            if p.wickets > 0:
+                wicket_points = p.wickets * 25
+                score += wicket_points
+                reasons.append(f"{p.wickets} wkts")
+                
+                overs = p.legal_balls_bowled / 6
+                if overs >= 2 and p.economy() < 6:
+                    score += 10
+                    reasons.append(f"eco {p.economy():.1f}")
+            
+            if score > best_score:
+                best_score = score
+                best_player = p
+                best_reason = ", ".join(reasons)
+        
+        if best_player:
+            return best_player.name, best_reason
+        else:
+            return "No outstanding performance", ""
+    
+    # --- Archive ---
+    
+    def get_archive(self) -> MatchArchive:
+        if self.archive is None:
+            self.archive = MatchArchive(self.archive_path)
+        return self.archive
+    
+    def finished_innings2_data(self) -> Optional[InningsData]:
+        """The second innings' figures once the match is over.
+        
+        A chase that has reached its target counts even before end_innings().
+        """
+        s = self.state
+        if s.innings2_data is not None:
+            return s.innings2_data
+        if s.current_innings == 2 and s.target and s.score >= s.target:
+            return InningsData(score=s.score, wickets=s.wickets,
+                               legal_balls=s.legal_balls, extras=s.extras)
+        return None
+    
+    def archive_match(self) -> bool:
+        """Keep the finished match in the archive; safe to call more than once"""
+        if self.finished_innings2_data() is None or self.match_uid is None:
+            return False
+        try:
+            return self.get_archive().add_match(self)
+        except Exception as e:
+            print(f"Archive error: {e}")
+            return False
+    
+    def clear_save(self):
+        self.flush()
+        self.close_journal()
+        self.checkpoints.clear()
+        for path in (self.legacy_path, self.legacy_journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.journal_undoable = 0
+        self.checkpoint_seq = None
+        self.is_resumed = False
@@ -0,0 +1,163 @@
+"""Match data models"""
+
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    """Individual player statistics"""
+    name: str = "Player"
+    runs: int = 0
+    balls_faced: int = 0
+    fours: int = 0
+    sixes: int = 0
+    wickets: int = 0
+    runs_conceded: int = 0
+    legal_balls_bowled: int = 0
+    
+    def strike_rate(self) -> float:
+        return (self.runs / self.balls_faced * 100) if self.balls_faced > 0 else 0.0
+    
+    def economy(self) -> float:
+        overs = self.legal_balls_bowled / 6
+        return (self.runs_conceded / overs) if overs > 0 else 0.0
+
+# Column order of a player row in save files
+PLAYER_FIELDS = ('name', 'runs', 'balls_faced', 'fours', 'sixes',
+                 'wickets', 'runs_conceded', 'legal_balls_bowled')
+
+# PlayerStats -> row tuple in PLAYER_FIELDS order, done in C (see PlayerRecord)
+player_row = attrgetter(*PLAYER_FIELDS)
+
+def players_from_rows(rows: Iterable[Sequence], fields: Sequence[str] = PLAYER_FIELDS) -> List[PlayerStats]:
+    """Rebuild PlayerStats from rows, mapping by name if the columns differ"""
+    if tuple(fields) == PLAYER_FIELDS:
+        return [PlayerStats(*row) for row in rows]
+    known = [(i, f) for i, f in enumerate(fields) if f in PLAYER_FIELDS]
+    return [PlayerStats(**{f: row[i] for i, f in known}) for row in rows]
+
+@dataclass
+class InningsData:
+    """Store complete innings data"""
+    score: int = 0
+    wickets: int = 0
+    legal_balls: int = 0
+    extras: int = 0
+    
+    def overs_str(self) -> str:
+        return f"{self.legal_balls // 6}.{self.legal_balls % 6}"
+
+@dataclass(slots=True)
+class OverStats:
+    """Running totals of one over, kept up to date ball by ball"""
+    number: int  # 0 for the first over
+    bowler_idx: int
+    runs: int = 0
+    wickets: int = 0
+    extras: int = 0
+    legal_balls: int = 0
+    deliveries: int = 0
+
+class FallOfWicket(NamedTuple):
+    """Score and over when a wicket fell; immutable, so versions share it"""
+    score: int
+    legal_balls: int
+    batter_idx: int  # the batter out
+    partner_idx: int  # the batter left in, -1 if batting alone
+    bowler_idx: int
+    
+    def overs_str(self) -> str:
+        return f"{self.legal_balls // 6}.{self.legal_balls % 6}"
+
+class Partnership(NamedTuple):
+    """One stand, from one wicket to the next (or to now)"""
+    number: int  # 1 for the opening stand
+    batter_idx: int
+    partner_idx: int  # -1 for the last man batting alone
+    runs: int
+    legal_balls: int
+    unbroken: bool
+
+def partnerships(falls: Sequence[FallOfWicket], score: int, legal_balls: int,
+                 players: int, wickets_to_end: int) -> List[Partnership]:
+    """Every stand of an innings, from its falls of wickets and current total.
+    
+    Each stand is the difference between the totals at the wickets either
+    side of it, so this is O(wickets) however long the innings. Batters
+    come in in order, so the pair at the crease is whoever of the first
+    wickets + 2 is not out.
+    """
+    stands = []
+    runs_before = balls_before = 0
+    for number, fow in enumerate(falls, 1):
+        stands.append(Partnership(number, fow.batter_idx, fow.partner_idx,
+                                  fow.score - runs_before, fow.legal_balls - balls_before, False))
+        runs_before, balls_before = fow.score, fow.legal_balls
+    
+    if len(falls) < wickets_to_end:
+        out = {fow.batter_idx for fow in falls}
+        batting = [i for i in range(min(len(falls) + 2, players)) if i not in out]
+        if batting:
+            stands.append(Partnership(len(falls) + 1, batting[0],
+                                      batting[1] if len(batting) > 1 else -1,
+                                      score - runs_before, legal_balls - balls_before, True))
+    return stands
+
+@dataclass
+class MatchState:
+    """Complete match state at any moment"""
+    score: int = 0
+    wickets: int = 0
+    legal_balls: int = 0
+    extras: int = 0
+    
+    striker_idx: int = 0
+    non_striker_idx: int = 1
+    bowler_idx: int = 0
+    
+    current_innings: int = 1
+    target: Optional[int] = None
+    
+    innings1_data: Optional[InningsData] = None
+    innings2_data: Optional[InningsData] = None
+    
+    # Every delivery of the innings, packed (see notation.encode_ball)
+    balls: bytearray = field(default_factory=bytearray)
+    # The first innings' deliveries, kept once the second one starts
+    innings1_balls: bytes = b''
+    
+    # Per-over totals of this innings, and of the first once it is over
+    overs: List[OverStats] = field(default_factory=list)
+    innings1_overs: List[OverStats] = field(default_factory=list)
+    # Falls of wickets of this innings, and of the first once it is over
+    falls: List[FallOfWicket] = field(default_factory=list)
+    innings1_falls: List[FallOfWicket] = field(default_factory=list)
+    
+    team1_stats: List[PlayerStats] = field(default_factory=list)
+    team2_stats: List[PlayerStats] = field(default_factory=list)
+
+@dataclass(slots=True)
+class DeliveryDelta:
+    """What a single delivery changed, so undo can apply the inverse"""
+    args: tuple
+    
+    score: int = 0
+    wickets: int = 0
+    legal_balls: int = 0
+    extras: int = 0
+    
+    # Positions before the delivery
+    striker_idx: int = 0
+    non_striker_idx: int = 1
+    bowler_idx: int = 0
+    
+    bat_runs: int = 0
+    bat_balls: int = 0
+    bat_fours: int = 0
+    bat_sixes: int = 0
+    
+    bowl_runs: int = 0
+    bowl_balls: int = 0
+    bowl_wickets: int = 0
@@ -0,0 +1,96 @@
+"""Delivery encodings: scorecard shorthand ("1", "W", "Wd+2") and packed bytes"""
+
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+# Each delivery packs into two bytes (one little-endian uint16):
+#   bits 0-2   runs off the bat (0-7)
+#   bits 3-4   extra type (EXTRA_*)
+#   bit  5     wicket
+#   bits 8-11  extra runs (0-15)
+#   bits 12-15 bowler index (0-15)
+BALL_BYTES = 2
+EXTRA_NONE, EXTRA_WIDE, EXTRA_NOBALL = 0, 1, 2
+# Largest values the fields above can hold
+MAX_RUNS, MAX_EXTRA_RUNS, MAX_BOWLER = 7, 15, 15
+
+_ball_struct = struct.Struct('<H')
+
+
+def parse_ball(token: str) -> Tuple[int, bool, bool, bool, int]:
+    """Turn one shorthand token into process_delivery arguments.
+    
+    Uses the same notation the scoring screen shows in its history strip:
+    a run count, "W" for a wicket, and "Wd"/"Nb" optionally followed by
+    "+runs" for runs taken off a wide or no-ball.
+    """
+    tok = token.strip()
+    upper = tok.upper()
+    
+    if upper == 'W':
+        return 0, False, False, True, 0
+    
+    for prefix, is_wide in (('WD', True), ('NB', False)):
+        if upper.startswith(prefix):
+            rest = upper[len(prefix):]
+            runs = 0
+            if rest:
+                if not rest.startswith('+') or not rest[1:].isdigit():
+                    raise ValueError(f"Bad delivery: {token!r}")
+                runs = int(rest[1:])
+            return runs, is_wide, not is_wide, False, 0
+    
+    if not tok.isdigit():
+        raise ValueError(f"Bad delivery: {token!r}")
+    return int(tok), False, False, False, 0
+
+
+def parse_deliveries(text: str) -> List[Tuple[int, bool, bool, bool, int]]:
+    """Parse a space or comma separated run of shorthand tokens"""
+    return [parse_ball(tok) for tok in text.replace(',', ' ').split()]
+
+
+def encode_ball(runs_scored: int, is_wide, is_noball, is_wicket, runs_from_extra: int,
+                bowler_idx: int) -> bytes:
+    if not 0 <= runs_scored <= MAX_RUNS:
+        raise ValueError(f"Runs out of range: {runs_scored}")
+    if not 0 <= runs_from_extra <= MAX_EXTRA_RUNS:
+        raise ValueError(f"Extra runs out of range: {runs_from_extra}")
+    if not 0 <= bowler_idx <= MAX_BOWLER:
+        raise ValueError(f"Bowler index out of range: {bowler_idx}")
+    
+    extra = EXTRA_WIDE if is_wide else EXTRA_NOBALL if is_noball else EXTRA_NONE
+    code = (runs_scored | extra << 3 | bool(is_wicket) << 5
+            | runs_from_extra << 8 | bowler_idx << 12)
+    return _ball_struct.pack(code)
+
+
+def decode_ball(code: int) -> Tuple[int, bool, bool, bool, int, int]:
+    """(runs_scored, is_wide, is_noball, is_wicket, runs_from_extra, bowler_idx)"""
+    extra = code >> 3 & 3
+    return (code & 7, extra == EXTRA_WIDE, extra == EXTRA_NOBALL, bool(code & 32),
+            code >> 8 & 15, code >> 12)
+
+
+def ball_codes(balls: bytes) -> Iterator[int]:
+    for (code,) in _ball_struct.iter_unpack(balls):
+        yield code
+
+
+def format_ball(code: int) -> str:
+    """History-strip text for one packed delivery"""
+    if code & 32:
+        return "W"
+    runs = (code & 7) + (code >> 8 & 15)
+    extra = code >> 3 & 3
+    if extra == EXTRA_NONE:
+        return str(code & 7)
+    label = "Wd" if extra == EXTRA_WIDE else "Nb"
+    return f"{label}+{runs}" if runs > 0 else label
+
+
+def format_balls(balls: bytes, last: Optional[int] = None) -> List[str]:
+    """History-strip text for packed deliveries, optionally only the newest `last`"""
+    if last is not None:
+        balls = balls[-last * BALL_BYTES:] if last > 0 else b''
+    return [format_ball(code) for code in ball_codes(balls)]
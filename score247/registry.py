@@ -0,0 +1,129 @@
+"""Several matches scored side by side from one app.
+
+Each match has its own MatchManager, and with it its own checkpoints and
+journal, undo history and (once writers are started) PersistWorker. The
+first match, MAIN, keeps its files in data_dir itself so saves from the
+single-match app still resume; the others live in data_dir/matches/<key>.
+All of them share the match archive and the par-score cache.
+
+Switching matches is a dict lookup: every manager stays in memory with
+its state as it was, so nothing is read back from disk.
+"""
+
+import os
+from typing import Dict, List
+
+from .manager import MatchManager
+
+
+class MatchRegistry:
+    """MatchManagers by key, one of them active"""
+    
+    MAIN = 'main'
+    
+    def __init__(self, data_dir: str = '.'):
+        self.data_dir = data_dir
+        self.matches_dir = os.path.join(data_dir, 'matches')
+        self.matches: Dict[str, MatchManager] = {}
+        self.writers = None
+        self.active_key = self.MAIN
+        self.add(self.MAIN)
+    
+    @property
+    def active(self) -> MatchManager:
+        return self.matches[self.active_key]
+    
+    @property
+    def main(self) -> MatchManager:
+        return self.matches[self.MAIN]
+    
+    def add(self, key: str = None) -> MatchManager:
+        """New, empty match under `key` (or the next free 'match-N')"""
+        if key is None:
+            key = self.new_key()
+        if key in self.matches:
+            raise ValueError(f"Match {key} already exists")
+        
+        if key == self.MAIN:
+            mgr = MatchManager(self.data_dir)
+        else:
+            match_dir = os.path.join(self.matches_dir, key)
+            os.makedirs(match_dir, exist_ok=True)
+            mgr = MatchManager(match_dir)
+            main = self.main
+            mgr.archive_path = main.archive_path
+            mgr.archive = main.get_archive()
+            mgr.resources = main.resources
+        
+        if self.writers is not None:
+            mgr.start_writer(*self.writers)
+        self.matches[key] = mgr
+        return mgr
+    
+    def new_key(self) -> str:
+        """First 'match-N' not in use, open or saved"""
+        taken = set(self.keys())
+        n = 2
+        while f'match-{n}' in taken:
+            n += 1
+        return f'match-{n}'
+    
+    def open(self, key: str) -> MatchManager:
+        """The match under `key`, resuming its save the first time it is opened"""
+        mgr = self.matches.get(key)
+        if mgr is None:
+            if key not in self.saved_keys():
+                raise KeyError(key)
+            mgr = self.add(key)
+            mgr.load_from_disk()
+        return mgr
+    
+    def switch(self, key: str) -> MatchManager:
+        """Make `key` the active match; O(1) once it has been opened"""
+        mgr = self.open(key)
+        self.active_key = key
+        return mgr
+    
+    def remove(self, key: str):
+        """Drop a match and its save; the archive keeps it if it finished"""
+        if key == self.MAIN:
+            raise ValueError("The main match cannot be removed")
+        mgr = self.matches.get(key) or self.add(key)
+        mgr.stop_writer()
+        mgr.clear_save()
+        del self.matches[key]
+        try:
+            os.rmdir(mgr.checkpoints.data_dir)
+        except OSError:
+            pass
+        if self.active_key == key:
+            self.active_key = self.MAIN
+    
+    def keys(self) -> List[str]:
+        """Every match, open or only saved, MAIN first"""
+        keys = list(self.matches)
+        keys += [key for key in self.saved_keys() if key not in self.matches]
+        return keys
+    
+    def saved_keys(self) -> List[str]:
+        """Keys of the side matches that have a directory on disk"""
+        if not os.path.isdir(self.matches_dir):
+            return []
+        return sorted(name for name in os.listdir(self.matches_dir)
+                      if os.path.isdir(os.path.join(self.matches_dir, name)))
+    
+    # --- Every match at once ---
+    
+    def start_writers(self, delay: float = 0.3, max_unsaved_balls: int = 6):
+        self.writers = (delay, max_unsaved_balls)
+        for mgr in self.matches.values():
+            mgr.start_writer(delay, max_unsaved_balls)
+    
+    def flush(self):
+        for mgr in self.matches.values():
+            mgr.flush()
+    
+    def stop_writers(self):
+        self.writers = None
+        for mgr in self.matches.values():
+            mgr.stop_writer()
@@ -0,0 +1,149 @@
+"""Par scores and revised targets from a DLS-style resource table.
+
+For every (balls left, wickets left) pair the table holds the runs a side
+can still expect to score, worked out by dynamic programming over the
+delivery outcomes of winprob.PRIOR and this match's wide/no-ball rules.
+The share of that expectation a side has used up is the share of its
+resources gone, which turns into par scores and revised targets the same
+way the Duckworth-Lewis-Stern tables do.
+
+A table depends only on the overs, the wickets available and the rules,
+so each one is computed once and kept in a small JSON cache on disk.
+"""
+
+import json
+import os
+from typing import List, NamedTuple
+
+from .winprob import PRIOR, WICKET, WIDE
+
+# Bump when the outcome model or the recurrence changes, to drop old tables
+MODEL_VERSION = 1
+
+
+class ResourceRules(NamedTuple):
+    balls: int
+    wickets: int
+    wide_runs: int
+    wide_legal: bool
+    noball_runs: int
+    noball_legal: bool
+    
+    def key(self) -> str:
+        return (f"v{MODEL_VERSION}:{self.balls}b{self.wickets}w:"
+                f"wd{self.wide_runs}{int(self.wide_legal)}:nb{self.noball_runs}{int(self.noball_legal)}")
+
+
+def expected_runs_table(rules: ResourceRules, probs=PRIOR) -> List[List[float]]:
+    """table[w][b]: runs expected from b balls with w wickets in hand"""
+    total = sum(probs)
+    legal_outcomes = []
+    illegal_p = illegal_runs = 0.0
+    for outcome, weight in enumerate(probs):
+        p = weight / total
+        if outcome == WICKET:
+            legal_outcomes.append((p, 0, True))
+        elif outcome < WICKET:
+            legal_outcomes.append((p, outcome, False))
+        else:
+            runs, legal = ((rules.wide_runs, rules.wide_legal) if outcome == WIDE
+                           else (rules.noball_runs, rules.noball_legal))
+            if legal:
+                legal_outcomes.append((p, runs, False))
+            else:
+                illegal_p += p
+                illegal_runs += p * runs
+    
+    # A ball that does not count is bowled again, so each legal ball comes
+    # with 1 / (1 - illegal_p) deliveries on average
+    scale = 1.0 / (1.0 - illegal_p)
+    table = [[0.0] * (rules.balls + 1) for _ in range(rules.wickets + 1)]
+    for w in range(1, rules.wickets + 1):
+        row, below = table[w], table[w - 1]
+        for b in range(1, rules.balls + 1):
+            e = illegal_runs
+            for p, runs, is_wicket in legal_outcomes:
+                e += p * (runs + (below[b - 1] if is_wicket else row[b - 1]))
+            row[b] = e * scale
+    return table
+
+
+class ResourceTable:
+    """Expected remaining runs, and the par arithmetic built on them"""
+    
+    def __init__(self, rules: ResourceRules, table: List[List[float]]):
+        self.rules = rules
+        self.table = table
+    
+    def expected(self, balls_left: int, wickets_left: int) -> float:
+        b = min(max(balls_left, 0), self.rules.balls)
+        w = min(max(wickets_left, 0), self.rules.wickets)
+        return self.table[w][b]
+    
+    def full(self) -> float:
+        """Expected score of a whole innings"""
+        return self.table[self.rules.wickets][self.rules.balls]
+    
+    def used(self, legal_balls: int, wickets: int) -> float:
+        """Share of an innings' resources gone after these balls and wickets"""
+        full = self.full()
+        if full <= 0:
+            return 1.0
+        left = self.expected(self.rules.balls - legal_balls, self.rules.wickets - wickets)
+        return 1.0 - left / full
+    
+    def par(self, first_score: int, first_used: float, second_used: float) -> float:
+        """What the side batting second should have after using `second_used`"""
+        if second_used <= first_used and first_used > 0:
+            return first_score * second_used / first_used
+        # More resources than the first side had: the extra is worth runs
+        # at the rate of an average full innings
+        return first_score + self.full() * (second_used - first_used)
+    
+    def revised_target(self, first_score: int, first_used: float) -> int:
+        """Target for a full second innings after a shortened first one"""
+        return int(self.par(first_score, first_used, 1.0)) + 1
+
+
+class ResourceCache:
+    """Tables by rules, in memory and in one JSON file"""
+    
+    def __init__(self, path: str, keep: int = 8):
+        self.path = path
+        self.keep = keep
+        self._tables = {}
+    
+    def get(self, rules: ResourceRules) -> ResourceTable:
+        key = rules.key()
+        table = self._tables.get(key)
+        if table is None:
+            saved = self._read()
+            rows = saved.get(key)
+            if rows is None:
+                rows = expected_runs_table(rules)
+                saved[key] = [[round(e, 3) for e in row] for row in rows]
+                self._write(saved)
+            table = self._tables[key] = ResourceTable(rules, rows)
+        return table
+    
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as fd:
+                return json.load(fd)
+        except (OSError, ValueError) as e:
+            print(f"Load error: {e}")
+            return {}
+    
+    def _write(self, saved: dict):
+        # Oldest first, as inserted; drop the extras
+        for key in list(saved)[:-self.keep]:
+            del saved[key]
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fd:
+                json.dump(saved, fd, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Save error: {e}")
@@ -0,0 +1,162 @@
+"""On-disk storage for match saves"""
+
+import json
+import os
+import zlib
+from typing import Optional
+
+
+class JsonFileStore:
+    """Drop-in for kivy's JsonStore that needs nothing beyond the stdlib.
+    
+    Uses the same on-disk layout ({key: {field: value}}), so save files
+    written by earlier versions of the app keep loading.
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._data = {}
+        if os.path.exists(filename):
+            with open(filename) as fd:
+                text = fd.read()
+            if text:
+                self._data = json.loads(text)
+    
+    def exists(self, key: str) -> bool:
+        return key in self._data
+    
+    def get(self, key: str) -> dict:
+        return self._data[key]
+    
+    def put(self, key: str, **values):
+        self._data[key] = values
+        self._sync()
+    
+    def delete(self, key: str):
+        del self._data[key]
+        self._sync()
+    
+    def keys(self):
+        return list(self._data.keys())
+    
+    def _sync(self):
+        with open(self.filename, 'w') as fd:
+            json.dump(self._data, fd)
+
+
+class CheckpointStore:
+    """Crash-safe, rotating full-match checkpoints.
+    
+    Each checkpoint is written to a temp file, fsynced and renamed into
+    place, so a reader only ever sees a complete file. The file starts with
+    a one-line header (magic, version, CRC32 and length of the body) that
+    catches anything the rename cannot, like a corrupted sector. The newest
+    `keep` checkpoints are kept, each with the journal of events recorded
+    after it; older ones are deleted as new ones are written.
+    """
+    
+    MAGIC = 'S247CKPT'
+    VERSION = 1
+    
+    def __init__(self, data_dir: str = '.', prefix: str = 'score247', keep: int = 3):
+        self.data_dir = data_dir
+        self.prefix = prefix
+        self.keep = keep
+        self._generations = None
+    
+    def checkpoint_path(self, gen: int) -> str:
+        return os.path.join(self.data_dir, f'{self.prefix}_ckpt.{gen:06d}')
+    
+    def journal_path(self, gen: int) -> str:
+        return os.path.join(self.data_dir, f'{self.prefix}_journal.{gen:06d}.log')
+    
+    def generations(self) -> list:
+        """Checkpoint generations on disk, oldest first"""
+        if self._generations is None:
+            marker = f'{self.prefix}_ckpt.'
+            gens = []
+            for name in os.listdir(self.data_dir):
+                if name.startswith(marker) and name[len(marker):].isdigit():
+                    gens.append(int(name[len(marker):]))
+            self._generations = sorted(gens)
+        return self._generations
+    
+    def latest_generation(self) -> int:
+        gens = self.generations()
+        return gens[-1] if gens else 0
+    
+    def save(self, data: dict) -> int:
+        """Atomically write a new checkpoint and return its generation"""
+        body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        header = f'{self.MAGIC} {self.VERSION} {zlib.crc32(body):08x} {len(body)}\n'
+        
+        gen = self.latest_generation() + 1
+        path = self.checkpoint_path(gen)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as fd:
+            fd.write(header.encode('ascii'))
+            fd.write(body)
+            fd.flush()
+            os.fsync(fd.fileno())
+        os.replace(tmp_path, path)
+        self._sync_dir()
+        
+        gens = self.generations()
+        gens.append(gen)
+        while len(gens) > self.keep:
+            self._remove(gens.pop(0))
+        return gen
+    
+    def read(self, gen: int) -> Optional[dict]:
+        """Checkpoint contents, or None if missing, torn or corrupt"""
+        try:
+            with open(self.checkpoint_path(gen), 'rb') as fd:
+                header = fd.readline().decode('ascii').split()
+                body = fd.read()
+            magic, version, crc, length = header
+            if magic != self.MAGIC or int(version) != self.VERSION:
+                return None
+            if len(body) != int(length) or zlib.crc32(body) != int(crc, 16):
+                return None
+            return json.loads(body)
+        except (OSError, ValueError):
+            return None
+    
+    def scan(self):
+        """Yield (generation, data) for valid checkpoints, newest first.
+        
+        Only the newest checkpoint is read in the normal case; older ones
+        are only touched when it fails verification.
+        """
+        for gen in reversed(self.generations()):
+            data = self.read(gen)
+            if data is not None:
+                yield gen, data
+    
+    def clear(self):
+        for gen in self.generations():
+            self._remove(gen)
+        self._generations = []
+    
+    def _remove(self, gen: int):
+        self._remove_file(self.checkpoint_path(gen))
+        self._remove_file(self.journal_path(gen))
+    
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def _sync_dir(self):
+        # Make the rename itself durable; not supported everywhere
+        try:
+            fd = os.open(self.data_dir, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,147 @@
+"""Time travel: the match state after any ball of either innings.
+
+The packed deliveries of each innings (MatchState.balls, and
+innings1_balls once the second innings is under way) are the event
+stream. Each ball carries its bowler and everything else follows from
+the rules, so the state after ball k is a replay of the first k balls.
+To keep that replay short, a StateVersion is kept every `interval` balls
+and a lookup restarts from the nearest one. Balls the manager's own
+StateHistory still covers are served from it directly.
+"""
+
+from typing import Dict, Iterator, List, Tuple
+
+from .models import MatchState, PlayerStats
+from .notation import BALL_BYTES, ball_codes, decode_ball
+from .versions import StateHistory, StateVersion, freeze
+
+
+class MatchTimeline:
+    """State after ball k of innings i, from checkpoints plus a short replay"""
+    
+    def __init__(self, mgr, interval: int = 30):
+        self.mgr = mgr
+        self.interval = interval
+        self.reset()
+    
+    def reset(self):
+        """Forget every checkpoint, e.g. for a new or reloaded match"""
+        self._streams: Dict[int, bytes] = {}
+        self._checkpoints: Dict[int, List[StateVersion]] = {}
+    
+    def stream(self, innings: int) -> bytes:
+        """Packed deliveries of `innings` so far"""
+        s = self.mgr.state
+        if innings == 1 and s.current_innings == 2:
+            return s.innings1_balls
+        if innings == s.current_innings:
+            return s.balls
+        return b''
+    
+    def innings_length(self, innings: int) -> int:
+        return len(self.stream(innings)) // BALL_BYTES
+    
+    def total_balls(self) -> int:
+        return self.innings_length(1) + self.innings_length(2)
+    
+    def locate(self, position: int) -> Tuple[int, int]:
+        """(innings, ball) of a position counted across the whole match"""
+        first = self.innings_length(1)
+        if position <= first or self.mgr.state.current_innings == 1:
+            return 1, max(0, min(position, first))
+        return 2, min(position - first, self.innings_length(2))
+    
+    def batting_is_team1(self, innings: int) -> bool:
+        mgr = self.mgr
+        batting = mgr.batting_team_name
+        if innings != mgr.state.current_innings:
+            batting = mgr.bowling_team_name
+        return batting == mgr.team1_name
+    
+    def state_at(self, innings: int, ball: int) -> StateVersion:
+        """State after `ball` deliveries of `innings` (0 = before its first ball)"""
+        stream = self.stream(innings)
+        length = len(stream) // BALL_BYTES
+        if not 0 <= ball <= length:
+            raise IndexError(f"Innings {innings} has no ball {ball}")
+        
+        mgr = self.mgr
+        if innings == mgr.state.current_innings:
+            start = length - (len(mgr.versions) - 1)
+            if ball >= start:
+                return mgr.version_at(ball - start)
+        
+        checkpoints = self._checkpoints_for(innings, stream)
+        pos = min(ball // self.interval, len(checkpoints) - 1) * self.interval
+        version = checkpoints[pos // self.interval]
+        
+        # Walk forward one interval at a time, keeping each new checkpoint
+        while pos < ball:
+            step = min(ball, pos - pos % self.interval + self.interval)
+            version = self._replay(innings, version, stream[pos * BALL_BYTES:step * BALL_BYTES])
+            pos = step
+            if pos == len(checkpoints) * self.interval:
+                checkpoints.append(version)
+        return version
+    
+    def states(self, innings: int) -> Iterator[StateVersion]:
+        """Every state of `innings` in order, from before its first ball to now"""
+        stream = self.stream(innings)
+        version = self.state_at(innings, 0)
+        yield version
+        
+        fork = self._fork(innings, version)
+        for code in ball_codes(stream):
+            self._apply(fork, code)
+            yield fork.snapshot()
+    
+    def _checkpoints_for(self, innings: int, stream: bytes) -> List[StateVersion]:
+        checkpoints = self._checkpoints.get(innings)
+        old = self._streams.get(innings, b'')
+        
+        if checkpoints is None:
+            checkpoints = [self._base(innings)]
+        elif not stream.startswith(old):
+            # Undo rewrote the tail; drop the checkpoints past the change
+            common = 0
+            while common < min(len(old), len(stream)) and old[common] == stream[common]:
+                common += 1
+            del checkpoints[common // BALL_BYTES // self.interval + 1:]
+        
+        self._checkpoints[innings] = checkpoints
+        self._streams[innings] = bytes(stream)
+        return checkpoints
+    
+    def _base(self, innings: int) -> StateVersion:
+        """State before the first ball of `innings`"""
+        if innings == 2:
+            first = self.state_at(1, self.innings_length(1))
+            fork = self._fork(1, first)
+            fork.end_innings()
+            return fork.snapshot()
+        
+        s = self.mgr.state
+        return freeze(MatchState(
+            team1_stats=[PlayerStats(name=p.name) for p in s.team1_stats],
+            team2_stats=[PlayerStats(name=p.name) for p in s.team2_stats],
+        ))
+    
+    def _fork(self, innings: int, version: StateVersion):
+        fork = self.mgr.fork()
+        if self.batting_is_team1(innings) != (fork.batting_team_name == fork.team1_name):
+            fork.batting_team_name, fork.bowling_team_name = \
+                fork.bowling_team_name, fork.batting_team_name
+        fork.state = version.thaw()
+        fork.versions = StateHistory(version)
+        return fork
+    
+    def _replay(self, innings: int, version: StateVersion, balls: bytes) -> StateVersion:
+        fork = self._fork(innings, version)
+        for code in ball_codes(balls):
+            self._apply(fork, code)
+        return fork.snapshot()
+    
+    def _apply(self, fork, code: int):
+        runs_scored, is_wide, is_noball, is_wicket, runs_from_extra, bowler = decode_ball(code)
+        fork.set_bowler(bowler)
+        fork.apply_delivery(runs_scored, is_wide, is_noball, is_wicket, runs_from_extra)
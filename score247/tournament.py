@@ -0,0 +1,280 @@
+"""Round-robin tournaments: fixtures, points table and net run rate.
+
+Net run rate is runs scored per over minus runs conceded per over, over
+every match a side has played. Each standing keeps the four running
+totals behind it (runs for and against, balls faced and bowled), so
+recording or withdrawing a result is a handful of additions to two
+standings and a side's NRR is two divisions, however long the season.
+A side bowled out is charged its full quota of overs, as usual.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .models import InningsData
+
+WIN_POINTS = 2
+TIE_POINTS = 1
+
+
+@dataclass(slots=True)
+class Standing:
+    """One side's row of the points table"""
+    team: str
+    played: int = 0
+    won: int = 0
+    lost: int = 0
+    tied: int = 0
+    points: int = 0
+    
+    runs_for: int = 0
+    balls_faced: int = 0
+    runs_against: int = 0
+    balls_bowled: int = 0
+    
+    def net_run_rate(self) -> float:
+        scored = self.runs_for / self.balls_faced * 6 if self.balls_faced else 0.0
+        conceded = self.runs_against / self.balls_bowled * 6 if self.balls_bowled else 0.0
+        return scored - conceded
+
+
+class MatchResult(NamedTuple):
+    """A completed match, as much of it as the table needs"""
+    batting_first: str
+    batting_second: str
+    first: InningsData
+    second: InningsData
+    overs: int
+    # Wickets that end an innings (players, or players - 1)
+    all_out: int
+    # The scored match's MatchManager.match_uid, so it is entered only once
+    uid: str = ''
+    
+    def winner(self) -> Optional[str]:
+        """Winning side, or None for a tie"""
+        if self.second.score > self.first.score:
+            return self.batting_second
+        if self.second.score < self.first.score:
+            return self.batting_first
+        return None
+    
+    def balls_charged(self, innings: InningsData) -> int:
+        """Balls an innings counts for in NRR: the full quota if bowled out"""
+        if innings.wickets >= self.all_out:
+            return self.overs * 6
+        return innings.legal_balls
+
+
+def result_from_match(mgr) -> Optional[MatchResult]:
+    """Result of a manager's finished match, or None if it is not finished"""
+    s = mgr.state
+    # A chase that reached its target is finished before end_innings()
+    second = mgr.finished_innings2_data()
+    if s.innings1_data is None or second is None:
+        return None
+    # The sides swapped when the second innings started
+    return MatchResult(
+        batting_first=mgr.bowling_team_name,
+        batting_second=mgr.batting_team_name,
+        first=replace(s.innings1_data),
+        second=replace(second),
+        overs=mgr.overs,
+        all_out=mgr.get_max_wickets_for_innings_end(),
+        uid=mgr.match_uid or '',
+    )
+
+
+def round_robin(teams: List[str], legs: int = 1) -> List[List[Tuple[str, str]]]:
+    """Rounds of pairings where every side meets every other `legs` times.
+    
+    Circle method: one side stays put while the rest rotate, so each
+    round has every side playing at most once. With an odd number of
+    sides one of them sits out each round. Home and away swap every leg.
+    """
+    sides = list(teams) + ([None] if len(teams) % 2 else [])
+    n = len(sides)
+    rounds = []
+    for leg in range(legs):
+        ring = sides[:]
+        for r in range(n - 1):
+            pairs = []
+            for i in range(n // 2):
+                home, away = ring[i], ring[n - 1 - i]
+                if home is None or away is None:
+                    continue
+                # Alternate the fixed side's home games, and swap each leg
+                if (i == 0 and r % 2) != bool(leg % 2):
+                    home, away = away, home
+                pairs.append((home, away))
+            rounds.append(pairs)
+            ring.insert(1, ring.pop())
+    return rounds
+
+
+@dataclass(slots=True)
+class Fixture:
+    number: int
+    round: int
+    team1: str
+    team2: str
+    result: Optional[MatchResult] = None
+
+
+class Tournament:
+    """League with a fixture list and a points table kept up to date"""
+    
+    def __init__(self, name: str, teams: List[str], legs: int = 1,
+                 win_points: int = WIN_POINTS, tie_points: int = TIE_POINTS):
+        if len(set(teams)) != len(teams) or len(teams) < 2:
+            raise ValueError("A tournament needs two or more differently named sides")
+        self.name = name
+        self.teams = list(teams)
+        self.legs = legs
+        self.win_points = win_points
+        self.tie_points = tie_points
+        
+        self.fixtures: List[Fixture] = []
+        # Fixtures by pair of sides, in order, for finding a match's fixture
+        self._by_pair: Dict[frozenset, List[Fixture]] = {}
+        for r, pairs in enumerate(round_robin(teams, legs), 1):
+            for home, away in pairs:
+                fixture = Fixture(len(self.fixtures) + 1, r, home, away)
+                self.fixtures.append(fixture)
+                self._by_pair.setdefault(frozenset((home, away)), []).append(fixture)
+        self.standings: Dict[str, Standing] = {team: Standing(team) for team in teams}
+    
+    def pending(self) -> List[Fixture]:
+        return [f for f in self.fixtures if f.result is None]
+    
+    def find_fixture(self, team_a: str, team_b: str) -> Optional[Fixture]:
+        """First unplayed fixture between two sides, in either order"""
+        for fixture in self._by_pair.get(frozenset((team_a, team_b)), ()):
+            if fixture.result is None:
+                return fixture
+        return None
+    
+    def fixture_of(self, uid: str) -> Optional[Fixture]:
+        """Fixture a scored match was entered against, if it has been"""
+        if not uid:
+            return None
+        for fixture in self.fixtures:
+            if fixture.result is not None and fixture.result.uid == uid:
+                return fixture
+        return None
+    
+    def record(self, fixture: Fixture, result: MatchResult):
+        """Enter a fixture's result, replacing any entered before"""
+        if {result.batting_first, result.batting_second} != {fixture.team1, fixture.team2}:
+            raise ValueError(f"Fixture {fixture.number} is {fixture.team1} v {fixture.team2}")
+        if fixture.result is not None:
+            self._apply(fixture.result, -1)
+        fixture.result = result
+        self._apply(result, 1)
+    
+    def record_match(self, mgr) -> Optional[Fixture]:
+        """Enter a finished match against the next fixture between its sides.
+        
+        A match already entered is left where it is, so calling this again
+        (e.g. each time the result is shown) changes nothing.
+        """
+        result = result_from_match(mgr)
+        if result is None:
+            return None
+        entered = self.fixture_of(result.uid)
+        if entered is not None:
+            return entered
+        fixture = self.find_fixture(result.batting_first, result.batting_second)
+        if fixture is not None:
+            self.record(fixture, result)
+        return fixture
+    
+    def withdraw(self, fixture: Fixture):
+        """Take a result back out of the table, e.g. one entered by mistake"""
+        if fixture.result is not None:
+            self._apply(fixture.result, -1)
+            fixture.result = None
+    
+    def _apply(self, result: MatchResult, sign: int):
+        """Add (sign 1) or remove (sign -1) a result: O(1) whatever the season size"""
+        first = self.standings[result.batting_first]
+        second = self.standings[result.batting_second]
+        balls_first = result.balls_charged(result.first)
+        balls_second = result.balls_charged(result.second)
+        
+        first.runs_for += sign * result.first.score
+        first.balls_faced += sign * balls_first
+        first.runs_against += sign * result.second.score
+        first.balls_bowled += sign * balls_second
+        
+        second.runs_for += sign * result.second.score
+        second.balls_faced += sign * balls_second
+        second.runs_against += sign * result.first.score
+        second.balls_bowled += sign * balls_first
+        
+        winner = result.winner()
+        for side in (first, second):
+            side.played += sign
+            if winner is None:
+                side.tied += sign
+                side.points += sign * self.tie_points
+            elif winner == side.team:
+                side.won += sign
+                side.points += sign * self.win_points
+            else:
+                side.lost += sign
+    
+    def table(self) -> List[Standing]:
+        """Standings by points, then net run rate, then wins"""
+        return sorted(self.standings.values(),
+                      key=lambda s: (-s.points, -s.net_run_rate(), -s.won, s.team))
+    
+    # --- Persistence ---
+    
+    def to_save(self) -> dict:
+        return {
+            'name': self.name,
+            'teams': self.teams,
+            'legs': self.legs,
+            'win_points': self.win_points,
+            'tie_points': self.tie_points,
+            'results': [
+                [f.number, r.batting_first, r.batting_second, asdict(r.first),
+                 asdict(r.second), r.overs, r.all_out, r.uid]
+                for f in self.fixtures if (r := f.result) is not None
+            ],
+        }
+    
+    @classmethod
+    def from_save(cls, data: dict) -> 'Tournament':
+        tournament = cls(data['name'], data['teams'], data.get('legs', 1),
+                         data.get('win_points', WIN_POINTS), data.get('tie_points', TIE_POINTS))
+        # Results saved before match uids were kept have seven fields
+        for number, first_team, second_team, first, second, overs, all_out, *uid in data['results']:
+            tournament.record(tournament.fixtures[number - 1], MatchResult(
+                first_team, second_team, InningsData(**first), InningsData(**second),
+                overs, all_out, *uid))
+        return tournament
+    
+    def save(self, path: str) -> bool:
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as fd:
+                json.dump(self.to_save(), fd, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"Save error: {e}")
+            return False
+    
+    @classmethod
+    def load(cls, path: str) -> Optional['Tournament']:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as fd:
+                return cls.from_save(json.load(fd))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Load error: {e}")
+            return None
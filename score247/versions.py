@@ -0,0 +1,236 @@
+"""Immutable, structurally shared versions of the match state.
+
+Every delivery produces a new StateVersion that reuses every player record
+and every ball-history cell it did not change, so keeping a version per
+ball costs a handful of small tuples. Versions are never mutated, which
+makes them safe to hand to another thread (e.g. the persistence worker)
+while the UI keeps scoring.
+"""
+
+import base64
+from dataclasses import asdict
+from typing import List, NamedTuple, Optional, Tuple
+
+from .models import (PLAYER_FIELDS, FallOfWicket, InningsData, MatchState, PlayerStats,
+                     player_row)
+from .notation import BALL_BYTES, ball_codes, format_ball
+
+
+class PlayerRecord(NamedTuple):
+    """Read-only PlayerStats"""
+    name: str = "Player"
+    runs: int = 0
+    balls_faced: int = 0
+    fours: int = 0
+    sixes: int = 0
+    wickets: int = 0
+    runs_conceded: int = 0
+    legal_balls_bowled: int = 0
+    
+    # Same definitions as PlayerStats, so the figures always agree
+    strike_rate = PlayerStats.strike_rate
+    economy = PlayerStats.economy
+    
+    @classmethod
+    def from_stats(cls, p: PlayerStats) -> 'PlayerRecord':
+        return cls._make(player_row(p))
+
+
+# Ball history as a persistent linked list of packed ball codes
+# (see notation.encode_ball): (code, previous cell) or None.
+# Pushing a ball shares the whole existing history.
+History = Optional[Tuple[int, 'History']]
+
+
+def history_push(history: History, code: int) -> History:
+    return (code, history)
+
+
+def history_list(history: History, last: Optional[int] = None) -> List[int]:
+    """Ball codes oldest first, optionally only the newest `last` entries"""
+    codes = []
+    while history is not None and (last is None or len(codes) < last):
+        code, history = history
+        codes.append(code)
+    codes.reverse()
+    return codes
+
+
+def history_bytes(history: History) -> bytearray:
+    return bytearray(b''.join(code.to_bytes(BALL_BYTES, 'little')
+                              for code in history_list(history)))
+
+
+class StateVersion(NamedTuple):
+    """Complete match state at one moment, immutable"""
+    score: int
+    wickets: int
+    legal_balls: int
+    extras: int
+    striker_idx: int
+    non_striker_idx: int
+    bowler_idx: int
+    current_innings: int
+    target: Optional[int]
+    innings1_data: Optional[InningsData]
+    innings2_data: Optional[InningsData]
+    innings1_balls: bytes
+    history: History
+    team1: Tuple[PlayerRecord, ...]
+    team2: Tuple[PlayerRecord, ...]
+    falls: Tuple[FallOfWicket, ...] = ()
+    innings1_falls: Tuple[FallOfWicket, ...] = ()
+    
+    def ball_history(self, last: Optional[int] = None) -> List[str]:
+        return [format_ball(code) for code in history_list(self.history, last)]
+    
+    def thaw(self) -> MatchState:
+        """Mutable copy, e.g. to resume scoring from this point"""
+        return MatchState(
+            score=self.score,
+            wickets=self.wickets,
+            legal_balls=self.legal_balls,
+            extras=self.extras,
+            striker_idx=self.striker_idx,
+            non_striker_idx=self.non_striker_idx,
+            bowler_idx=self.bowler_idx,
+            current_innings=self.current_innings,
+            target=self.target,
+            innings1_data=self.innings1_data,
+            innings2_data=self.innings2_data,
+            balls=history_bytes(self.history),
+            innings1_balls=self.innings1_balls,
+            falls=list(self.falls),
+            innings1_falls=list(self.innings1_falls),
+            team1_stats=[PlayerStats(*p) for p in self.team1],
+            team2_stats=[PlayerStats(*p) for p in self.team2],
+        )
+    
+    def to_save(self) -> dict:
+        """The 'state' section of a save file"""
+        return {
+            'score': self.score,
+            'wickets': self.wickets,
+            'legal_balls': self.legal_balls,
+            'extras': self.extras,
+            'striker_idx': self.striker_idx,
+            'non_striker_idx': self.non_striker_idx,
+            'bowler_idx': self.bowler_idx,
+            'current_innings': self.current_innings,
+            'target': self.target,
+            'innings1_data': asdict(self.innings1_data) if self.innings1_data else None,
+            'innings2_data': asdict(self.innings2_data) if self.innings2_data else None,
+            # The whole innings, two bytes a ball
+            'balls': base64.b64encode(history_bytes(self.history)).decode('ascii'),
+            'innings1_balls': base64.b64encode(self.innings1_balls).decode('ascii'),
+            # Records are already rows in PLAYER_FIELDS order
+            'player_fields': PLAYER_FIELDS,
+            'team1_rows': self.team1,
+            'team2_rows': self.team2,
+            # Falls of wickets are rows in FallOfWicket field order
+            'falls': self.falls,
+            'innings1_falls': self.innings1_falls,
+        }
+
+
+def freeze(state: MatchState) -> StateVersion:
+    """Full O(players + balls) conversion; used once per innings or load"""
+    history = None
+    for code in ball_codes(state.balls):
+        history = history_push(history, code)
+    
+    return StateVersion(
+        score=state.score,
+        wickets=state.wickets,
+        legal_balls=state.legal_balls,
+        extras=state.extras,
+        striker_idx=state.striker_idx,
+        non_striker_idx=state.non_striker_idx,
+        bowler_idx=state.bowler_idx,
+        current_innings=state.current_innings,
+        target=state.target,
+        innings1_data=state.innings1_data,
+        innings2_data=state.innings2_data,
+        innings1_balls=bytes(state.innings1_balls),
+        history=history,
+        team1=tuple(PlayerRecord.from_stats(p) for p in state.team1_stats),
+        team2=tuple(PlayerRecord.from_stats(p) for p in state.team2_stats),
+        falls=tuple(state.falls),
+        innings1_falls=tuple(state.innings1_falls),
+    )
+
+
+def _replace_record(team: tuple, idx: int, stats: List[PlayerStats]) -> tuple:
+    record = PlayerRecord.from_stats(stats[idx])
+    if team[idx] == record:
+        return team
+    return team[:idx] + (record,) + team[idx + 1:]
+
+
+def advance(prev: StateVersion, state: MatchState, striker_idx: int, bowler_idx: int,
+            batting_is_team1: bool) -> StateVersion:
+    """Next version after a delivery, sharing everything it did not touch.
+    
+    Only the striker and bowler of the ball can have changed, so just those
+    two records are rebuilt. The team tuples are copied (a few pointers for
+    a gully-sized squad); the players in them are not. The falls of
+    wickets are shared unless this ball took one.
+    """
+    if batting_is_team1:
+        team1 = _replace_record(prev.team1, striker_idx, state.team1_stats)
+        team2 = _replace_record(prev.team2, bowler_idx, state.team2_stats)
+    else:
+        team2 = _replace_record(prev.team2, striker_idx, state.team2_stats)
+        team1 = _replace_record(prev.team1, bowler_idx, state.team1_stats)
+    
+    falls = prev.falls
+    if len(falls) != len(state.falls):
+        falls = tuple(state.falls)
+    
+    return prev._replace(
+        score=state.score,
+        wickets=state.wickets,
+        legal_balls=state.legal_balls,
+        extras=state.extras,
+        striker_idx=state.striker_idx,
+        non_striker_idx=state.non_striker_idx,
+        bowler_idx=state.bowler_idx,
+        history=history_push(prev.history,
+                             int.from_bytes(state.balls[-BALL_BYTES:], 'little')),
+        team1=team1,
+        team2=team2,
+        falls=falls,
+    )
+
+
+class StateHistory:
+    """One StateVersion per delivery of the current innings.
+    
+    Index 0 is the state at the start of the innings (or at resume), and
+    index n the state after the n-th delivery recorded since then. Push,
+    pop and lookup are all O(1).
+    """
+    
+    def __init__(self, base: StateVersion):
+        self._versions = [base]
+    
+    def __len__(self) -> int:
+        return len(self._versions)
+    
+    @property
+    def head(self) -> StateVersion:
+        return self._versions[-1]
+    
+    def at(self, ball: int) -> StateVersion:
+        return self._versions[ball]
+    
+    def push(self, version: StateVersion):
+        self._versions.append(version)
+    
+    def pop(self) -> StateVersion:
+        if len(self._versions) == 1:
+            raise IndexError("Cannot pop the base version")
+        return self._versions.pop()
+    
+    def replace_head(self, version: StateVersion):
+        self._versions[-1] = version
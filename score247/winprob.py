@@ -0,0 +1,185 @@
+"""Win probability for the chasing side, by Monte Carlo simulation.
+
+The rest of the innings is played out a few thousand times at once with
+NumPy: every simulated run draws all its remaining deliveries in one go,
+and cumulative sums over those draws tell when each run reaches the
+target or ends (balls used up, wickets gone). Delivery outcomes come from
+a fixed prior blended with what this match has produced so far, and the
+match's own wide/no-ball rules decide what each outcome is worth.
+
+NumPy is optional; without it win_probability() returns None and the app
+just leaves the estimate out.
+"""
+
+import importlib.util
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+from .notation import ball_codes, decode_ball
+
+# Imported on first use, since NumPy alone adds ~100 ms to app startup
+np = None
+
+# Outcome categories: 0-6 runs off the bat, then wicket, wide, no-ball
+WICKET, WIDE, NOBALL = 7, 8, 9
+
+# A typical short-format delivery, worth PRIOR_BALLS deliveries of evidence
+PRIOR = (35.0, 25.0, 8.0, 1.0, 10.0, 0.3, 5.0, 6.0, 6.0, 3.0)
+PRIOR_BALLS = 60
+
+# Resolution of the outcome lookup table
+TABLE_SIZE = 4096
+
+
+class ChaseSpec(NamedTuple):
+    """Everything a simulation needs, detached from the live match"""
+    runs_needed: int
+    balls_left: int
+    wickets_left: int
+    wide_runs: int
+    wide_legal: bool
+    noball_runs: int
+    noball_legal: bool
+    probs: Tuple[float, ...]
+
+
+def available() -> bool:
+    return np is not None or importlib.util.find_spec('numpy') is not None
+
+
+def _load_numpy() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def outcome_probabilities(*innings_balls: bytes) -> Tuple[float, ...]:
+    """Outcome distribution: the prior, updated with the deliveries given"""
+    counts = [0] * len(PRIOR)
+    for balls in innings_balls:
+        for code in ball_codes(balls):
+            runs, is_wide, is_noball, is_wicket = decode_ball(code)[:4]
+            if is_wicket:
+                counts[WICKET] += 1
+            elif is_wide:
+                counts[WIDE] += 1
+            elif is_noball:
+                counts[NOBALL] += 1
+            else:
+                counts[min(runs, 6)] += 1
+    
+    prior_total = sum(PRIOR)
+    weights = [p / prior_total * PRIOR_BALLS + c for p, c in zip(PRIOR, counts)]
+    total = sum(weights)
+    return tuple(w / total for w in weights)
+
+
+def chase_spec(mgr) -> Optional[ChaseSpec]:
+    """The chase as it stands, or None outside a live second innings"""
+    s = mgr.state
+    if not s.target or s.innings2_data is not None:
+        return None
+    return ChaseSpec(
+        runs_needed=s.target - s.score,
+        balls_left=mgr.overs * 6 - s.legal_balls,
+        wickets_left=mgr.get_max_wickets_for_innings_end() - s.wickets,
+        wide_runs=int(mgr.wide_gives_runs),
+        wide_legal=mgr.wide_counts_as_ball,
+        noball_runs=int(mgr.noball_gives_runs),
+        noball_legal=not mgr.noball_rebowled,
+        probs=outcome_probabilities(s.innings1_balls, s.balls),
+    )
+
+
+def win_probability(spec: ChaseSpec, sims: int = 2000, seed=None) -> Optional[float]:
+    """Chance the chasing side gets there; a tie counts as half"""
+    if spec.runs_needed <= 0:
+        return 1.0
+    if spec.balls_left <= 0 or spec.wickets_left <= 0:
+        return 0.0
+    if not _load_numpy():
+        return None
+    
+    runs = np.array([0, 1, 2, 3, 4, 5, 6, 0, spec.wide_runs, spec.noball_runs], dtype=np.int64)
+    legal = np.array([1] * 8 + [spec.wide_legal, spec.noball_legal], dtype=np.int64)
+    wickets = np.zeros(len(runs), dtype=np.int64)
+    wickets[WICKET] = 1
+    
+    # Each outcome packed as runs | legal balls << 16 | wickets << 32, so a
+    # single cumulative sum tracks all three
+    packed = runs | legal << 16 | wickets << 32
+    
+    # Outcomes drawn by indexing a table holding each one in proportion to
+    # its probability, far cheaper than a search per draw
+    probs = np.array(spec.probs) / sum(spec.probs)
+    counts = np.floor(probs * TABLE_SIZE).astype(np.int64)
+    counts[np.argmax(probs)] += TABLE_SIZE - counts.sum()
+    table = np.repeat(packed, counts)
+    
+    # Enough deliveries for the innings to finish in almost every run,
+    # allowing for extras that do not count as balls
+    illegal = float(probs[legal == 0].sum())
+    length = int(spec.balls_left / max(1.0 - illegal, 0.2) * 1.25) + 6
+    
+    rng = np.random.default_rng(seed)
+    totals = np.cumsum(table[rng.integers(0, TABLE_SIZE, (sims, length))], axis=1)
+    
+    total_runs = totals & 0xFFFF
+    ended = (((totals >> 16) & 0xFFFF) >= spec.balls_left) | ((totals >> 32) >= spec.wickets_left)
+    reached = total_runs >= spec.runs_needed
+    
+    # Index of the delivery that ends the innings / reaches the target
+    end_at = np.where(ended.any(axis=1), ended.argmax(axis=1), length - 1)
+    reach_at = np.where(reached.any(axis=1), reached.argmax(axis=1), length)
+    
+    wins = reach_at <= end_at
+    ties = ~wins & (total_runs[np.arange(sims), end_at] == spec.runs_needed - 1)
+    return float(wins.sum() + 0.5 * ties.sum()) / sims
+
+
+class WinProbabilityWorker:
+    """Runs win_probability() off the UI thread.
+    
+    Only the newest request matters: one submitted while a simulation is
+    running replaces any that is still waiting. `callback(spec, result)`
+    is called from the worker thread.
+    """
+    
+    def __init__(self, sims: int = 2000):
+        self.sims = sims
+        self._cond = threading.Condition()
+        self._request = None
+        self._stopped = False
+        
+        self._thread = threading.Thread(target=self._run, name='score247-winprob', daemon=True)
+        self._thread.start()
+    
+    def submit(self, spec: ChaseSpec, callback):
+        with self._cond:
+            self._request = (spec, callback)
+            self._cond.notify_all()
+    
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._request is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                (spec, callback), self._request = self._request, None
+            
+            try:
+                callback(spec, win_probability(spec, self.sims))
+            except Exception as e:
+                print(f"Win probability error: {e}")
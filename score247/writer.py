@@ -0,0 +1,137 @@
+"""Write-behind persistence for MatchManager"""
+
+import threading
+import time
+
+# Seconds before a failed write is tried again, unless a flush asks sooner
+RETRY_DELAY = 1.0
+
+
+class PersistWorker:
+    """Background thread that performs a MatchManager's disk writes.
+    
+    The manager hands over journal lines ('j') and checkpoint payloads ('c')
+    in order. Items that arrive within `delay` seconds of each other are
+    written together: only the newest checkpoint is written, followed by the
+    journal lines queued after it in a single append.
+    
+    A crash can lose at most `max_unsaved_balls` deliveries: once that many
+    are queued, submit() blocks until they are on disk.
+    
+    A batch that fails to write (e.g. the disk is full) stays queued ahead
+    of anything submitted since and is tried again, and its balls still
+    count as unsaved. flush() then returns after one more attempt rather
+    than blocking the scorer for as long as the disk keeps failing.
+    """
+    
+    def __init__(self, mgr, delay: float = 0.3, max_unsaved_balls: int = 6):
+        self.mgr = mgr
+        self.delay = delay
+        self.max_unsaved_balls = max_unsaved_balls
+        
+        self._cond = threading.Condition()
+        self._pending = []
+        self._unsaved_balls = 0
+        self._busy = False
+        self._flush_requested = False
+        self._stopped = False
+        # Set while the last attempt failed, until a write succeeds
+        self._error = None
+        self._attempts = 0
+        self._retry_at = 0.0
+        
+        self._thread = threading.Thread(target=self._run, name='score247-writer', daemon=True)
+        self._thread.start()
+    
+    @property
+    def unsaved_balls(self) -> int:
+        return self._unsaved_balls
+    
+    def submit(self, kind: str, payload, balls: int = 0):
+        with self._cond:
+            self._pending.append((kind, payload, balls))
+            self._unsaved_balls += balls
+            over_limit = self._unsaved_balls >= self.max_unsaved_balls
+            self._cond.notify_all()
+        if over_limit:
+            self.flush()
+    
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+    
+    def flush(self):
+        with self._cond:
+            if not self._pending and not self._busy:
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            # Wait for everything to land, or for one more attempt to fail
+            attempts = self._attempts + (2 if self._busy else 1)
+            while self._pending or self._busy:
+                if self._error is not None and self._attempts >= attempts:
+                    return
+                self._cond.wait()
+    
+    def stop(self):
+        self.flush()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                # Stopping gives up on writes that are still failing
+                if not self._pending or (self._stopped and self._error is not None):
+                    return
+                
+                # Give quick successive taps a chance to join this write;
+                # after a failure, wait until the retry is due
+                deadline = max(time.monotonic() + self.delay, self._retry_at)
+                while not self._flush_requested and not self._stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+                self._busy = True
+            
+            try:
+                self._write(batch)
+                error = None
+            except Exception as e:
+                print(f"Save error: {e}")
+                error = e
+            with self._cond:
+                if error is None:
+                    self._unsaved_balls -= sum(balls for _, _, balls in batch)
+                else:
+                    # Try the whole batch again; lines it already appended
+                    # are skipped on replay by their sequence numbers
+                    self._pending = batch + self._pending
+                    self._retry_at = time.monotonic() + RETRY_DELAY
+                self._error = error
+                self._attempts += 1
+                self._busy = False
+                self._cond.notify_all()
+    
+    def _write(self, batch):
+        start = 0
+        for i, (kind, payload, _) in enumerate(batch):
+            if kind == 'c':
+                start = i
+        
+        kind, payload, _ = batch[start]
+        if kind == 'c':
+            self.mgr.write_checkpoint(payload)
+            start += 1
+        
+        lines = [payload for kind, payload, _ in batch[start:] if kind == 'j']
+        if lines:
+            self.mgr.write_journal(''.join(lines))
@@ -90,7 +90,8 @@ SCORING_HISTORY_HEIGHT = 0.25  # Ball history display
 # Home Screen
 HOME_TITLE_HEIGHT = 0.30
 HOME_BTN_HEIGHT = 0.15
-HOME_SPACER_HEIGHT = 0.40
+HOME_TOGGLE_HEIGHT = 0.10
+HOME_SPACER_HEIGHT = 0.30
 
 # Setup Screen
 SETUP_HEADER_HEIGHT = 0.08
@@ -103,9 +104,17 @@ RESULT_WINNER_HEIGHT = 0.18
 RESULT_SCORES_HEIGHT = 0.15
 RESULT_POM_HEIGHT = 0.18
 RESULT_BUTTONS_HEIGHT = 0.15
-RESULT_SPACER_HEIGHT = 0.24
+RESULT_CHARTS_HEIGHT = 0.24  # Manhattan and worm
 
 # Stats Screen
 STATS_HEADER_HEIGHT = 0.10
-STATS_CONTENT_HEIGHT = 0.78
+STATS_SCRUBBER_HEIGHT = 0.08
+STATS_CHARTS_HEIGHT = 0.20
+STATS_CONTENT_HEIGHT = 0.50
 STATS_BUTTON_HEIGHT = 0.12
+
+# Diagnostics Screen (hidden: tap the home title five times)
+DIAG_HEADER_HEIGHT = 0.10
+DIAG_CONTROLS_HEIGHT = 0.10
+DIAG_CONTENT_HEIGHT = 0.68
+DIAG_BUTTON_HEIGHT = 0.12